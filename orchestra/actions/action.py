@@ -8,6 +8,10 @@ from loguru import logger
 import orchestra.model.configuration
 from .util import run_user_script, run_internal_script, get_script_output
 from .util import try_run_internal_script, try_get_script_output
+from ..util import Environment
+
+# Estimated duration (in seconds) of actions which do not provide a better guess
+DEFAULT_ESTIMATED_DURATION = 1
 
 
 class Action:
@@ -16,16 +20,29 @@ class Action:
         self.config: "orchestra.model.configuration.Configuration" = config
         self._explicit_dependencies: Set[Action] = set()
         self._script = script
+        self._environment: Optional[Environment] = None
+        self._environment_config = None
+        # Short description of the progress of the running action, displayed in the status bar
+        self.progress: Optional[str] = None
 
     def run(self, pretend=False, explicitly_requested=False):
         logger.info(f"Executing {self}")
         if not pretend:
-            self._run(explicitly_requested=explicitly_requested)
+            try:
+                self._run(explicitly_requested=explicitly_requested)
+            finally:
+                self.progress = None
+                # Running the action (even partially) can change which actions are satisfied
+                self.config.satisfaction_snapshot.invalidate()
 
     def _run(self, explicitly_requested=False):
         """Executes the action"""
         self._run_user_script(self.script)
 
+    def report_progress(self, progress: Optional[str]):
+        """Updates the progress displayed in the status bar. Can be called from the worker thread running the action"""
+        self.progress = progress
+
     def assert_prerequisites_are_met(self):
         """Checks that the action will not fail early due to missing prerequisites.
         :raises UserException if the action is destined to fail
@@ -55,13 +72,34 @@ class Action:
         return self._implicit_dependencies()
 
     def is_satisfied(self):
-        """Returns true if the action is satisfied."""
+        """Returns true if the action is satisfied.
+        The result is memoized in the satisfaction snapshot of the configuration until an action completes.
+        """
+        return self.config.satisfaction_snapshot.is_satisfied(self)
+
+    def _is_satisfied(self):
+        """Checks if the action is satisfied, bypassing the satisfaction snapshot"""
         raise NotImplementedError()
 
+    def estimated_duration(self) -> float:
+        """Returns a rough estimate of how long the action will take to run, in seconds.
+        Used to prioritize the actions on the critical path when running them concurrently.
+        """
+        return DEFAULT_ESTIMATED_DURATION
+
     @property
-    def environment(self) -> "OrderedDict[str, str]":
-        """Returns additional environment variables provided to the script to be run"""
-        return self.config.global_env()
+    def environment(self) -> Environment:
+        """Returns additional environment variables provided to the script to be run.
+        The environment is computed the first time it is needed, subclasses extend it by overriding _create_environment
+        """
+        # The cached environment is tied to the configuration it was computed from
+        if self._environment is None or self._environment_config is not self.config:
+            self._environment = Environment(self._create_environment())
+            self._environment_config = self.config
+        return self._environment
+
+    def _create_environment(self) -> "OrderedDict[str, str]":
+        return OrderedDict(self.config.global_env())
 
     @property
     def _target_name(self):
@@ -86,7 +124,25 @@ class Action:
         return self.__str__()
 
     def _run_user_script(self, script, cwd=None):
-        run_user_script(script, environment=self.environment, cwd=cwd)
+        run_user_script(
+            script, environment=self._user_script_environment(self.environment), cwd=cwd, pass_fds=self._inherited_fds
+        )
+
+    @property
+    def _inherited_fds(self):
+        """File descriptors inherited by user scripts (i.e. the jobserver pipe, if any)"""
+        if self.config.jobserver is None:
+            return ()
+        return self.config.jobserver.fds
+
+    def _user_script_environment(self, environment: Environment) -> Environment:
+        """Adds MAKEFLAGS to the environment of a user script, so that `make` joins the jobserver.
+        Only user scripts inherit the jobserver pipe, other processes must not refer to its file descriptors.
+        MAKEFLAGS set by the configuration takes precedence.
+        """
+        if self.config.jobserver is None or "MAKEFLAGS" in environment:
+            return environment
+        return environment.updated({"MAKEFLAGS": self.config.jobserver.makeflags})
 
     def _run_internal_script(self, script, cwd=None):
         run_internal_script(script, environment=self.environment, cwd=cwd)
@@ -106,9 +162,8 @@ class ActionForRepository(Action):
         super().__init__(name, script, config)
         self.repository = repository
 
-    @property
-    def environment(self) -> "OrderedDict[str, str]":
-        env = super().environment
+    def _create_environment(self) -> "OrderedDict[str, str]":
+        env = super()._create_environment()
         if self.source_dir:
             env["SOURCE_DIR"] = self.source_dir
         return env
@@ -131,9 +186,8 @@ class ActionForBuild(ActionForRepository):
         self.component = build.component
         self.build = build
 
-    @property
-    def environment(self) -> "OrderedDict[str, str]":
-        env = super().environment
+    def _create_environment(self) -> "OrderedDict[str, str]":
+        env = super()._create_environment()
         env["BUILD_DIR"] = self.build_dir
         env["TMP_ROOT"] = self.tmp_root
         return env
@@ -144,7 +198,7 @@ class ActionForBuild(ActionForRepository):
 
     @property
     def tmp_root(self) -> str:
-        return os.path.join(super().environment["TMP_ROOTS"], self.build.safe_name)
+        return os.path.join(self.config.global_env()["TMP_ROOTS"], self.build.safe_name)
 
     @property
     def _target_name(self):
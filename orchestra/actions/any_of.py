@@ -11,6 +11,8 @@ class AnyOfAction:
     def __init__(self, actions: Set[Union[Action, "AnyOfAction"]], preferred_action: Action):
         self.actions: Set[Union[Action, "AnyOfAction"]] = actions
         self.preferred_action: Union[Action, "AnyOfAction"] = preferred_action
+        # AnyOf actions are compared structurally, the hash is computed once as the alternatives never change
+        self._hash = hash((frozenset(actions), preferred_action))
         self.unique_number = AnyOfAction.INSTANCE_COUNTER
         AnyOfAction.INSTANCE_COUNTER += 1
 
@@ -40,11 +42,13 @@ class AnyOfAction:
         return f"Any of {{{', '.join(a.name_for_components for a in self.actions)}}}"
 
     def __eq__(self, other):
-        if not isinstance(other, AnyOfAction):
+        if self is other:
+            return True
+
+        if not isinstance(other, AnyOfAction) or self._hash != other._hash:
             return False
 
-        return self.dependencies == other.dependencies and self.preferred_action == other.preferred_action
+        return self.actions == other.actions and self.preferred_action == other.preferred_action
 
     def __hash__(self):
-        # TODO: implement properly
-        return 0
+        return self._hash
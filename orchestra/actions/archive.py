@@ -0,0 +1,180 @@
+import os
+import subprocess
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, NamedTuple, Optional
+
+from ..exceptions import InternalException, InternalSubprocessException, UserException
+
+# Size of the chunks of the archive fed to the extractor
+EXTRACTION_BUFFER_SIZE = 1024 * 1024
+
+# Minimum interval (in seconds) between progress reports
+PROGRESS_INTERVAL = 0.2
+
+
+class ArchiveFormat(NamedTuple):
+    # Extension of the archives, including the leading dot
+    extension: str
+    # Magic bytes at the beginning of the compressed stream
+    magic: bytes
+    # Program decompressing the archives
+    decompressor: str
+    # Command compressing the archives, `{level}` is replaced with the compression level
+    compressor: str
+    default_level: int
+    # Range of the compression levels accepted by the compressor
+    min_level: int
+    max_level: int
+
+
+# Binary archive formats, in order of preference when an archive is available in more than one format
+ARCHIVE_FORMATS = OrderedDict(
+    [
+        # Levels above 19 would require --ultra, which makes decompression use much more memory. High levels are much
+        # slower to compress, the default is a compromise between compression speed and archive size
+        ("zst", ArchiveFormat(".tar.zst", b"\x28\xb5\x2f\xfd", "zstd", "zstd -T0 -{level}", 9, 1, 19)),
+        ("xz", ArchiveFormat(".tar.xz", b"\xfd7zXZ\x00", "xz", "xz -T0 -{level}", 6, 0, 9)),
+        ("gz", ArchiveFormat(".tar.gz", b"\x1f\x8b", "gzip", "gzip -{level}", 6, 1, 9)),
+    ]
+)
+
+# Format used for new binary archives unless configured otherwise
+DEFAULT_ARCHIVE_FORMAT = "xz"
+
+# Magic bytes identifying the compression format, and the program used to decompress it
+_DECOMPRESSORS = [(archive_format.magic, archive_format.decompressor) for archive_format in ARCHIVE_FORMATS.values()]
+_DECOMPRESSORS.append((b"BZh", "bzip2"))
+
+
+def compressor_command(format_name: str, level: Optional[int] = None) -> str:
+    """Returns the command compressing an archive in the given format, suitable for `tar -I`"""
+    archive_format = ARCHIVE_FORMATS[format_name]
+    if level is None:
+        level = archive_format.default_level
+    if not archive_format.min_level <= level <= archive_format.max_level:
+        raise InternalException(f"Invalid compression level {level} for {format_name} archives")
+    return archive_format.compressor.format(level=level)
+
+
+def validate_compression_level(format_name: str, level: Optional[int]):
+    """Checks that the compression level is supported by the given format.
+    :raises UserException: if the level is out of range
+    """
+    archive_format = ARCHIVE_FORMATS[format_name]
+    if level is not None and not archive_format.min_level <= level <= archive_format.max_level:
+        raise UserException(
+            f"binary_archives_compression_level must be between {archive_format.min_level} and "
+            f"{archive_format.max_level} for {format_name} binary archives, got {level}"
+        )
+
+
+def extract_archive(
+    archive_path: str,
+    destination: str,
+    progress_callback: Optional[Callable[[str], None]] = None,
+) -> List[str]:
+    """Extracts a (possibly compressed) tar archive.
+
+    The archive is streamed to `tar` through a pipe with a bounded buffer, while its verbose output is parsed to record
+    the extracted files and to report the progress. The compression format is detected from the content of the archive.
+    Existing files are replaced, like `tar` does.
+    :param archive_path: path of the archive
+    :param destination: directory where the archive is extracted
+    :param progress_callback: called periodically with a short description of the extraction progress
+    :returns: the paths (relative to `destination`) of the extracted entries, excluding directories
+    """
+    archive_size = os.path.getsize(archive_path)
+    with open(archive_path, "rb") as archive_file:
+        decompressor = _detect_decompressor(archive_file)
+        tar_args = ["tar", "-x", "-v", "--quoting-style=literal", "-f", "-", "-C", destination]
+        if decompressor is not None:
+            tar_args += ["-I", decompressor]
+
+        # Multithreaded decompression, supported by recent xz versions
+        env = dict(os.environ, XZ_OPT="-T0")
+        with tempfile.TemporaryFile() as stderr:
+            tar = subprocess.Popen(tar_args, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=stderr, env=env)
+            feeder = _ArchiveFeeder(archive_file, tar.stdin)
+            feeder.start()
+
+            extracted_files = []
+            last_report = 0
+            for line in tar.stdout:
+                name = os.fsdecode(line.rstrip(b"\n"))
+                # Directories are listed with a trailing slash
+                if not name.endswith("/"):
+                    extracted_files.append(_normalize(name))
+
+                if progress_callback is not None and time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    progress_callback(_describe_progress(feeder.fed_bytes, archive_size, len(extracted_files)))
+                    last_report = time.monotonic()
+
+            tar.stdout.close()
+            feeder.join()
+            returncode = tar.wait()
+
+            if feeder.exception is not None:
+                raise feeder.exception
+
+            if returncode != 0:
+                stderr.seek(0)
+                raise InternalSubprocessException(tar_args, exitcode=returncode, stderr=stderr.read())
+
+    if progress_callback is not None:
+        progress_callback(_describe_progress(archive_size, archive_size, len(extracted_files)))
+
+    return extracted_files
+
+
+class _ArchiveFeeder(threading.Thread):
+    """Copies the archive to the standard input of the extractor, keeping track of the bytes copied so far"""
+
+    def __init__(self, archive_file, pipe):
+        super().__init__(daemon=True)
+        self.archive_file = archive_file
+        self.pipe = pipe
+        self.fed_bytes = 0
+        self.exception: Optional[Exception] = None
+
+    def run(self):
+        try:
+            while True:
+                chunk = self.archive_file.read(EXTRACTION_BUFFER_SIZE)
+                if not chunk:
+                    break
+                self.pipe.write(chunk)
+                self.fed_bytes += len(chunk)
+        except BrokenPipeError:
+            # The extractor exited early, its exit code tells what went wrong
+            pass
+        except Exception as e:
+            self.exception = e
+        finally:
+            try:
+                self.pipe.close()
+            except BrokenPipeError:
+                pass
+
+
+def _detect_decompressor(archive_file) -> Optional[str]:
+    magic = archive_file.read(8)
+    archive_file.seek(0)
+    for magic_bytes, decompressor in _DECOMPRESSORS:
+        if magic.startswith(magic_bytes):
+            return decompressor
+    return None
+
+
+def _describe_progress(fed_bytes, archive_size, files):
+    percentage = 100 * fed_bytes // archive_size if archive_size else 100
+    return f"extracting, {percentage}%, {files} files"
+
+
+def _normalize(name: str) -> str:
+    """Archive entries may be named `./path`, file lists use `path`"""
+    if name.startswith("./"):
+        name = name[2:]
+    return name
@@ -27,7 +27,7 @@ class CloneAction(ActionForRepository):
         script += " || \\\n  ".join(checkout_cmds)
         return script
 
-    def is_satisfied(self):
+    def _is_satisfied(self):
         return os.path.exists(self.environment["SOURCE_DIR"])
 
     def heads(self):
@@ -11,7 +11,7 @@ class ConfigureAction(ActionForBuild):
     def __init__(self, build, script, config):
         super().__init__("configure", build, script, config)
 
-    def is_satisfied(self):
+    def _is_satisfied(self):
         # TODO: invalidate configure if recursive_hash has changed
         return os.path.exists(self._configure_successful_path)
 
@@ -2,38 +2,51 @@ import glob
 import os
 import pathlib
 import shutil
-import stat
 import time
-from collections import OrderedDict, defaultdict
+from collections import OrderedDict
 from pathlib import Path
 from textwrap import dedent
-from typing import Iterable, List, Optional
+from typing import Iterable, List, Optional, Set
 
 from loguru import logger
 
 from .action import ActionForBuild
+from .archive import ARCHIVE_FORMATS, compressor_command, extract_archive
+from .post_install import PostInstallOptions, post_install
+from .tree_copy import merge_tree
 from .uninstall import uninstall
 from .util import run_user_script
 from ..exceptions import (
     BinaryArchiveNotFoundException,
     InternalCommandException,
-    InternalSubprocessException,
     UserException,
 )
 from ..gitutils import lfs
 from ..gitutils import get_worktree_root
+from ..util import expand_variables, index_directory
 from ..model.install_metadata import (
     load_metadata,
     init_metadata_from_build,
     save_metadata,
     save_file_list,
     is_installed,
+    metadata_matches,
     installed_component_license_path,
     installed_component_file_list_path,
     installed_component_metadata_path,
 )
 
 
+# Estimated duration (in seconds) of a build which was never installed before
+DEFAULT_BUILD_DURATION = 60
+
+# Assumed throughput (in bytes per second) of fetching and extracting a binary archive
+BINARY_ARCHIVE_THROUGHPUT = 50 * 1024 * 1024
+
+# Directories shared by many components, they are removed from the temporary root before merging
+CONFLICTING_DIRECTORIES = ["share/info", "share/locale"]
+
+
 class InstallAction(ActionForBuild):
     def __init__(
         self,
@@ -74,50 +87,46 @@ class InstallAction(ActionForBuild):
         logger.debug("Preparing temporary root directory")
         self._prepare_tmproot()
 
-        pre_file_list = self._index_directory(tmp_root + orchestra_root, relative_to=tmp_root + orchestra_root)
+        pre_file_index = index_directory(tmp_root + orchestra_root)
 
         install_start_time = time.time()
-        if self.allow_binary_archive and self.binary_archive_exists():
-            self._install_from_binary_archive()
+        if self.installs_from_binary_archive():
+            # Record the archive which is actually installed, which may not be in the configured format
+            binary_archive_relative_path = self._located_binary_archive_relative_path()
+            # The files are recorded while extracting the archive, no need to walk the temporary root
+            new_files = self._install_from_binary_archive(
+                binary_archive_relative_path, preexisting_files=pre_file_index.keys()
+            )
             source = "binary archives"
         elif self.allow_build:
+            binary_archive_relative_path = self.binary_archive_relative_path
             self._build_and_install()
             if self.create_binary_archive:
                 self._create_binary_archive()
+            new_files = index_directory(tmp_root + orchestra_root).keys() - pre_file_index.keys()
             source = "build"
         else:
             raise UserException(f"Could not find binary archive nor build: {self.build.qualified_name}")
         install_end_time = time.time()
 
-        post_file_list = self._index_directory(tmp_root + orchestra_root, relative_to=tmp_root + orchestra_root)
-        post_file_list.append(
+        new_files.add(
             os.path.relpath(installed_component_file_list_path(self.component.name, self.config), orchestra_root)
         )
-        post_file_list.append(
+        new_files.add(
             os.path.relpath(installed_component_metadata_path(self.component.name, self.config), orchestra_root)
         )
-        new_files = [f for f in post_file_list if f not in pre_file_list]
+        new_files = sorted(new_files)
 
         if not self.no_merge:
-            if is_installed(self.config, self.build.component.name):
-                logger.debug("Uninstalling previously installed build")
-                uninstall(self.build.component.name, self.config)
-
-            logger.debug("Checking for file conflicts")
-            conflicts_list = self._get_conflicts(new_files, orchestra_root)
-            if len(conflicts_list) > 0:
-                list_joined = "\n".join(conflicts_list)
-                raise UserException(f"File conflicts detected:\n{list_joined}\nAborting merge")
-
-            logger.debug("Merging installed files into orchestra root directory")
-            self._merge()
-
-            self._update_metadata(
-                new_files,
-                install_end_time - install_start_time,
-                source,
-                explicitly_requested,
-            )
+            # The root is shared by all the concurrently running actions, only one of them at a time can modify it
+            with self.config.root_lock:
+                self._merge_into_root(
+                    new_files,
+                    install_end_time - install_start_time,
+                    source,
+                    explicitly_requested,
+                    binary_archive_relative_path,
+                )
 
         if not self.keep_tmproot:
             logger.debug("Cleaning up tmproot")
@@ -127,7 +136,26 @@ class InstallAction(ActionForBuild):
             logger.debug("Discarding build directory")
             self._discard_build_directory()
 
-    def _update_metadata(self, file_list, install_time, source, set_manually_insalled):
+    def _merge_into_root(self, new_files, install_time, source, set_manually_installed, binary_archive_path):
+        """Merges the files installed in the temporary root into the orchestra root and records the installation.
+        Must be called while holding `config.root_lock`.
+        """
+        if is_installed(self.config, self.build.component.name):
+            logger.debug("Uninstalling previously installed build")
+            uninstall(self.build.component.name, self.config)
+
+        logger.debug("Checking for file conflicts")
+        conflicts_list = self._get_conflicts(new_files)
+        if len(conflicts_list) > 0:
+            list_joined = "\n".join(conflicts_list)
+            raise UserException(f"File conflicts detected:\n{list_joined}\nAborting merge")
+
+        logger.debug("Merging installed files into orchestra root directory")
+        self._merge()
+
+        self._update_metadata(new_files, install_time, source, set_manually_installed, binary_archive_path)
+
+    def _update_metadata(self, file_list, install_time, source, set_manually_insalled, binary_archive_path):
         # Save installed file list (.idx)
         save_file_list(self.component.name, file_list, self.config)
 
@@ -140,10 +168,12 @@ class InstallAction(ActionForBuild):
         metadata.source = source
         metadata.manually_installed = metadata.manually_installed or set_manually_insalled
         metadata.install_time = install_time
-        metadata.binary_archive_path = self.binary_archive_relative_path
+        metadata.binary_archive_path = binary_archive_path
 
         save_metadata(metadata, self.config)
 
+        self.config.file_ownership_index.add(self.component.name, self.build.name, file_list)
+
     def _prepare_tmproot(self):
         script = dedent(
             """
@@ -162,51 +192,101 @@ class InstallAction(ActionForBuild):
         )
         self._run_internal_script(script)
 
-    def _install_from_binary_archive(self):
-        # TODO: handle nonexisting binary archives
-        logger.debug("Fetching binary archive")
-        self._fetch_binary_archive()
-        logger.debug("Extracting binary archive")
-        self._extract_binary_archive()
+    def _install_from_binary_archive(self, binary_archive_relative_path: Optional[str], preexisting_files) -> Set[str]:
+        """Installs the binary archive in the temporary root.
+        :param binary_archive_relative_path: path of the binary archive relative to the binary archives repository
+        :param preexisting_files: files in the temporary root before extracting the archive
+        :returns: the files added to the temporary root (relative to the orchestra root)
+        """
+        destination = self.tmp_root + self.environment["ORCHESTRA_ROOT"]
+        cache = self.config.extracted_archives_cache
+        # The cache is keyed by the path of the archive within the binary archives repository
+        cache_key = binary_archive_relative_path if cache is not None else None
+
+        extracted_files = None
+        if cache_key is not None:
+            extracted_files = cache.restore(cache_key, destination)
+            if extracted_files is not None:
+                logger.debug("Installed binary archive from the extracted archives cache")
+
+        restored_from_cache = extracted_files is not None
+        if not restored_from_cache:
+            # TODO: handle nonexisting binary archives
+            logger.debug("Fetching binary archive")
+            archive_content_path = self._fetch_binary_archive()
+            logger.debug("Extracting binary archive")
+            extracted_files = self._extract_binary_archive(archive_content_path)
 
         logger.debug("Removing conflicting files")
         self._remove_conflicting_files()
 
-    def _fetch_binary_archive(self):
+        if cache_key is not None and not restored_from_cache:
+            logger.debug("Storing the extracted binary archive in the cache")
+            cache.store(cache_key, destination, extracted_files)
+
+        return {
+            path
+            for path in extracted_files
+            if path not in preexisting_files
+            and not any(path == d or path.startswith(f"{d}/") for d in CONFLICTING_DIRECTORIES)
+        }
+
+    def _located_binary_archive_relative_path(self) -> Optional[str]:
+        """Returns the path of the binary archive found by `locate_binary_archive`, relative to the binary archives
+        repository, or None if there is no binary archive"""
         binary_archive_path = self.locate_binary_archive()
-        assert binary_archive_path is not None
+        if binary_archive_path is None:
+            return None
+        # Strip the name of the binary archives repository
+        relative_path = os.path.relpath(binary_archive_path, self.config.binary_archives_dir)
+        return relative_path.split(os.sep, 1)[1]
+
+    def _fetch_binary_archive(self) -> str:
+        """Fetches the binary archive from git LFS.
+        The archive is not checked out in the binary archives working copy: its content is read directly from the
+        LFS object storage, which avoids copying it.
+        :returns: the path of a file with the content of the binary archive
+        """
+        binary_archive_path = self.locate_binary_archive()
+        if binary_archive_path is None:
+            raise UserException("Binary archive not found!")
         binary_archive_path = pathlib.Path(binary_archive_path)
         binary_archive_root = get_worktree_root(binary_archive_path)
         binary_archive_relative_path = binary_archive_path.relative_to(binary_archive_root)
-        failures = 0
-        retry_timeout = 5
-        while True:
-            try:
-                lfs.fetch(binary_archive_root, include=[binary_archive_relative_path])
-                break
-            except InternalSubprocessException as e:
-                time.sleep(retry_timeout)
-                retry_timeout *= 2
-                failures += 1
-                if failures >= self.config.max_lfs_retries:
-                    raise e
-
-    def _extract_binary_archive(self):
-        if not self.binary_archive_exists():
-            raise UserException("Binary archive not found!")
-
-        archive_filepath = self.locate_binary_archive()
-        script = dedent(
-            f"""
-            mkdir -p "$TMP_ROOT$ORCHESTRA_ROOT"
-            cd "$TMP_ROOT$ORCHESTRA_ROOT"
-            tar xaf "{archive_filepath}"
-            """
-        )
-        self._run_internal_script(script)
+        self.config.binary_archive_downloader.download(binary_archive_path, progress_callback=self.report_progress)
+
+        pointer = lfs.read_pointer(binary_archive_path)
+        if pointer is None:
+            # Already checked out
+            return str(binary_archive_path)
+
+        object_path = lfs.local_object_path(binary_archive_root, *pointer)
+        if object_path is None:
+            logger.debug("Binary archive not found in the LFS object storage, checking it out")
+            lfs.checkout_files(binary_archive_root, include=[binary_archive_relative_path])
+            return str(binary_archive_path)
+
+        return str(object_path)
+
+    def _extract_binary_archive(self, archive_filepath: str) -> List[str]:
+        destination = self.tmp_root + self.environment["ORCHESTRA_ROOT"]
+        os.makedirs(destination, exist_ok=True)
+        return extract_archive(archive_filepath, destination, progress_callback=self.report_progress)
+
+    def installs_from_binary_archive(self) -> bool:
+        """Returns True if the build is going to be installed from a binary archive rather than built"""
+        return self.allow_binary_archive and self.binary_archive_exists()
+
+    def binary_archive_cached(self) -> bool:
+        """Returns True if the tree extracted from the binary archive is in the extracted archives cache"""
+        cache = self.config.extracted_archives_cache
+        if cache is None:
+            return False
+        cache_key = self._located_binary_archive_relative_path()
+        return cache_key is not None and cache.contains(cache_key)
 
     def _implicit_dependencies(self):
-        if self.allow_binary_archive and self.binary_archive_exists() or not self.allow_build:
+        if self.installs_from_binary_archive() or not self.allow_build:
             return set()
         else:
             return {self.build.configure}
@@ -215,11 +295,10 @@ class InstallAction(ActionForBuild):
         return {self.build.configure}
 
     def _build_and_install(self):
-        env = self.environment
-        env["RUN_TESTS"] = "1" if self.run_tests else "0"
+        env = self.environment.updated({"RUN_TESTS": "1" if self.run_tests else "0"})
 
         logger.debug("Executing install script")
-        run_user_script(self.script, environment=env)
+        run_user_script(self.script, environment=self._user_script_environment(env), pass_fds=self._inherited_fds)
 
         logger.debug("Removing conflicting files")
         self._remove_conflicting_files()
@@ -230,36 +309,25 @@ class InstallAction(ActionForBuild):
             self._post_install()
 
     def _post_install(self):
-        logger.debug("Collecting tmproot files timestamps")
-        tmproot_timestamps = self._collect_times()
-
-        logger.debug("Dropping absolute paths from pkg-config")
-        self._drop_absolute_pkgconfig_paths()
-
-        logger.debug("Fix shebangs in bin/")
-        self._fix_shebangs()
-
-        logger.debug("Purging libtools' files")
-        self._purge_libtools_files()
-
-        # TODO: maybe this should be put into the configuration and not in orchestra itself
-        logger.debug("Converting hardlinks to symbolic")
-        self._hard_to_symbolic()
-
-        # TODO: maybe this should be put into the configuration and not in orchestra itself
-        logger.debug("Fixing RPATHs")
-        self._fix_rpath()
-
-        # TODO: this should be put into the configuration and not in orchestra itself
-        logger.debug("Replacing NDEBUG preprocessor statements")
-        self._replace_ndebug(self.build.ndebug)
-
-        # TODO: this should be put into the configuration and not in orchestra itself
-        logger.debug("Replacing ASAN preprocessor statements")
-        self._replace_asan(self.build.asan)
-
-        logger.debug("Restoring tmproot files timestamps")
-        self._restore_mtimes(tmproot_timestamps)
+        # TODO: these fixups should be put into the configuration and not in orchestra itself
+        logger.debug("Running post-install fixups")
+        orchestra_root = self.environment["ORCHESTRA_ROOT"]
+        options = PostInstallOptions(
+            root=f"{self.tmp_root}{orchestra_root}",
+            orchestra_root=orchestra_root,
+            rpath_search_strings=(
+                expand_variables(self.environment["RPATH_PLACEHOLDER"], self.environment),
+                orchestra_root,
+            ),
+            ndebug=self.build.ndebug,
+            asan=self.build.asan,
+        )
+        result = post_install(options, pool=self.config.post_install_pool)
+        logger.debug(
+            f"Post-install purged {result.purged_libtool_files} libtool files, converted {result.hardlinks_converted} "
+            f"hardlinks to symbolic links, rewrote {result.rewritten_files} files and fixed the RPATH of "
+            f"{result.patched_elfs} ELF files ({result.skipped_elfs} ELF files did not need it)"
+        )
 
         if self.build.component.license:
             logger.debug("Copying license file")
@@ -282,134 +350,37 @@ class InstallAction(ActionForBuild):
             self._run_internal_script(script)
 
     def _remove_conflicting_files(self):
-        script = dedent(
-            """
-            if test -d "$TMP_ROOT/$ORCHESTRA_ROOT/share/info"; then
-                rm -rf "$TMP_ROOT/$ORCHESTRA_ROOT/share/info";
-            fi
-            if test -d "$TMP_ROOT/$ORCHESTRA_ROOT/share/locale"; then
-                rm -rf "$TMP_ROOT/$ORCHESTRA_ROOT/share/locale";
-            fi
-            """
-        )
-        self._run_internal_script(script)
+        root = self.tmp_root + self.environment["ORCHESTRA_ROOT"]
+        for directory in CONFLICTING_DIRECTORIES:
+            path = os.path.join(root, directory)
+            if os.path.islink(path):
+                os.unlink(path)
+            elif os.path.isdir(path):
+                shutil.rmtree(path)
+
+    def _get_conflicts(self, file_list: Iterable[str]) -> List[str]:
+        """Returns the files in `file_list` which are already installed by another component or which exist in the
+        orchestra root without belonging to any component (e.g. leftovers of a failed installation)"""
+        file_list = list(file_list)
+        owners = self.config.file_ownership_index.owners(file_list)
+        conflicts = [f"{path} (installed by {owner})" for path, owner in owners.items()]
 
-    def _collect_times(self):
-        """Returns a dict[path, times], where times is a tuple(atime_ns, mtime_ns)"""
-        times = {}
-        for root, dirnames, filenames in os.walk(f'{self.environment["TMP_ROOT"]}{self.environment["ORCHESTRA_ROOT"]}'):
-            for path in filenames:
-                fullpath = os.path.join(root, path)
-                info = os.lstat(fullpath)
-                times[fullpath] = (info.st_atime_ns, info.st_mtime_ns)
-        return times
-
-    @staticmethod
-    def _restore_mtimes(mtimes):
-        for path, times in mtimes.items():
-            if os.path.exists(path):
-                os.utime(path, times=None, ns=times)
-
-    def _drop_absolute_pkgconfig_paths(self):
-        script = dedent(
-            r"""
-            cd "${TMP_ROOT}${ORCHESTRA_ROOT}"
-            for PKG_PATH in lib/pkgconfig share/pkgconfig; do
-              if [ -e "$PKG_PATH" ]; then
-                find "$PKG_PATH" -name '*.pc' -print0 | \
-                  xargs -0 -r -n 100 -P$(nproc) \
-                  sed \
-                    -i \
-                    's|/*'"$ORCHESTRA_ROOT"'/*|${pcfiledir}/../..|g'
-              fi
-            done
-            """
-        )
-        self._run_internal_script(script)
-
-    def _fix_shebangs(self):
-        script = dedent(
-            r"""
-            cd "${TMP_ROOT}${ORCHESTRA_ROOT}"
-            if [ -e bin ]; then
-              find bin -maxdepth 1 -type f -print0 | \
-                xargs -0 -r -n 100 -P$(nproc) \
-                sed \
-                  -i \
-                  '1 s|^#!'"$ORCHESTRA_ROOT"'/bin/|#!/usr/bin/env |g'
-            fi
-            """
-        )
-        self._run_internal_script(script)
-
-    def _purge_libtools_files(self):
-        script = dedent(
-            """
-            find "${TMP_ROOT}${ORCHESTRA_ROOT}" -name "*.la" -type f -delete
-            """
-        )
-        self._run_internal_script(script)
-
-    def _hard_to_symbolic(self):
-        duplicates = defaultdict(list)
-        for root, dirnames, filenames in os.walk(f'{self.environment["TMP_ROOT"]}{self.environment["ORCHESTRA_ROOT"]}'):
-            for path in filenames:
-                path = os.path.join(root, path)
-                info = os.lstat(path)
-                inode = info.st_ino
-                if inode == 0 or info.st_nlink < 2 or not stat.S_ISREG(info.st_mode):
-                    continue
-
-                duplicates[inode].append(path)
-
-        for _, equivalent in duplicates.items():
-            base = equivalent.pop()
-            for alternative in equivalent:
-                os.unlink(alternative)
-                os.symlink(os.path.relpath(base, os.path.dirname(alternative)), alternative)
-
-    def _fix_rpath(self):
-        replace_dynstr = os.path.join(os.path.dirname(__file__), "..", "support", "elf-replace-dynstr.py")
-        self._run_internal_script(
-            f'"{replace_dynstr}" "$TMP_ROOT$ORCHESTRA_ROOT" "$RPATH_PLACEHOLDER" "$ORCHESTRA_ROOT"'
-        )
-
-    def _replace_ndebug(self, disable_debugging):
-        debug, ndebug = ("0", "1") if disable_debugging else ("1", "0")
-        patch_ndebug_script = dedent(
-            rf"""
-            cd "$TMP_ROOT$ORCHESTRA_ROOT"
-            find include/ -name '*.h' -print0 | \
-              xargs -0 -r -n 100 -P$(nproc) \
-              sed -i \
-                -e 's|^\s*#\s*ifndef\s\+NDEBUG|#if {debug}|' \
-                -e 's|^\s*#\s*ifdef\s\+NDEBUG|#if {ndebug}|' \
-                -e 's|^\(\s*#\s*if\s\+.*\)!defined(NDEBUG)|\1{debug}|' \
-                -e 's|^\(\s*#\s*if\s\+.*\)defined(NDEBUG)|\1{ndebug}|'
-            """
-        )
-        self._run_internal_script(patch_ndebug_script)
+        orchestra_root = self.environment["ORCHESTRA_ROOT"]
+        for path in file_list:
+            if path.strip().lstrip("/") not in owners and os.path.lexists(os.path.join(orchestra_root, path)):
+                conflicts.append(f"{path} (not installed by any component)")
 
-    def _replace_asan(self, asan_enabled):
-        replace_with = "1" if asan_enabled else "0"
-        # fmt: off
-        patch_ndebug_script = dedent(rf"""
-            cd "$TMP_ROOT$ORCHESTRA_ROOT"
-            find include/ -name '*.h' -print0 | \
-              xargs -0 -r -n 100 -P$(nproc) \
-              sed -i \
-                -e 's|__has_feature\(address_sanitizer\)|{replace_with}|' \
-                -e 's|defined\(__SANITIZE_ADDRESS__\)|{replace_with}|'
-            """)
-        # fmt: on
-        self._run_internal_script(patch_ndebug_script)
-
-    def _get_conflicts(self, file_list: Iterable[str], root: str) -> List[str]:
-        return [file for file in file_list if os.path.exists(os.path.join(root, file))]
+        return sorted(conflicts)
 
     def _merge(self):
-        copy_command = 'cp -ar --reflink=auto "$TMP_ROOT/$ORCHESTRA_ROOT/." "$ORCHESTRA_ROOT"'
-        self._run_internal_script(copy_command)
+        """Merges the temporary root into the orchestra root.
+        Unless the temporary root has to be kept, its files are moved rather than copied.
+        """
+        orchestra_root = self.environment["ORCHESTRA_ROOT"]
+        try:
+            merge_tree(self.tmp_root + orchestra_root, orchestra_root, move=not self.keep_tmproot)
+        except OSError as e:
+            raise UserException(f"Could not merge {self.build.qualified_name} into the orchestra root: {e}") from e
 
     def _create_binary_archive(self):
         if self.binary_archive_exists():
@@ -423,13 +394,15 @@ class InstallAction(ActionForBuild):
             self.config.binary_archives_local_paths[binary_archive_repo_name],
             f"_tmp_{self.binary_archive_filename}",
         )
+        compressor = compressor_command(
+            self.config.binary_archives_format, self.config.binary_archives_compression_level
+        )
         script = dedent(
             f"""
             mkdir -p "$BINARY_ARCHIVES"
             cd "$TMP_ROOT$ORCHESTRA_ROOT"
             rm -f '{absolute_binary_archive_tmp_path}'
-            export XZ_OPT='-T0'
-            tar cvaf '{absolute_binary_archive_tmp_path}' --owner=0 --group=0 *
+            tar cvf '{absolute_binary_archive_tmp_path}' -I '{compressor}' --owner=0 --group=0 *
             mkdir -p '{binary_archive_parent_dir}'
             mv '{absolute_binary_archive_tmp_path}' '{binary_archive_path}'
             """
@@ -445,7 +418,7 @@ class InstallAction(ActionForBuild):
     def symlink_binary_archive(self, name: str):
         """Creates/updates convenience symlinks to the binary archive with the specified name.
         Example: {name}.tar.xz -> abcdef_fedcba.tar.xz would be created if `abcdef_defcba.tar.xz`
-        exists in the binary archives.
+        exists in the binary archives. If the archive exists in more than one format the preferred one is linked.
         """
         logger.debug("Adding binary archive symlink")
 
@@ -459,32 +432,20 @@ class InstallAction(ActionForBuild):
             commit = "none"
 
         archive_dir_path = os.path.dirname(self._binary_archive_path())
-        target_name = self._binary_archive_filename(commit, self.component.recursive_hash)
-        target_absolute_path = os.path.join(archive_dir_path, target_name)
-        symlink_absolute_path = os.path.join(archive_dir_path, f"{name}.tar.xz")
-        if os.path.exists(target_absolute_path):
-            if os.path.exists(symlink_absolute_path):
+        for target_format in ARCHIVE_FORMATS.values():
+            target_name = self._binary_archive_filename(commit, self.component.recursive_hash, target_format.extension)
+            if os.path.exists(os.path.join(archive_dir_path, target_name)):
+                break
+        else:
+            return
+
+        # Drop symlinks with the same name pointing to archives in other formats
+        for archive_format in ARCHIVE_FORMATS.values():
+            symlink_absolute_path = os.path.join(archive_dir_path, f"{name}{archive_format.extension}")
+            if os.path.lexists(symlink_absolute_path):
                 os.unlink(symlink_absolute_path)
-            os.symlink(target_name, symlink_absolute_path)
 
-    @staticmethod
-    def _index_directory(root_dir_path, relative_to=None):
-        paths = []
-        for current_dir_path, child_dir_names, child_file_names in os.walk(root_dir_path):
-            for child_filename in child_file_names:
-                child_file_path = os.path.join(current_dir_path, child_filename)
-                if relative_to:
-                    child_file_path = os.path.relpath(child_file_path, relative_to)
-                paths.append(child_file_path)
-
-            for child_dir in child_dir_names:
-                child_dir_path = os.path.join(current_dir_path, child_dir)
-                if os.path.islink(child_dir_path):
-                    if relative_to:
-                        child_dir_path = os.path.relpath(child_dir_path, relative_to)
-                    paths.append(child_dir_path)
-
-        return paths
+        os.symlink(target_name, os.path.join(archive_dir_path, f"{name}{target_format.extension}"))
 
     def _cleanup_tmproot(self):
         shutil.rmtree(self.tmp_root, ignore_errors=True)
@@ -531,7 +492,8 @@ class InstallAction(ActionForBuild):
         to get a path which is unique to a single build
         """
         component_commit = self.component.commit() or "none"
-        return self._binary_archive_filename(component_commit, self.component.recursive_hash)
+        extension = ARCHIVE_FORMATS[self.config.binary_archives_format].extension
+        return self._binary_archive_filename(component_commit, self.component.recursive_hash, extension)
 
     @property
     def binary_archive_relative_dir(self) -> str:
@@ -553,8 +515,8 @@ class InstallAction(ActionForBuild):
         return self._hash_material_filename(component_commit, self.component.recursive_hash)
 
     @staticmethod
-    def _binary_archive_filename(component_commit, component_recursive_hash) -> str:
-        return f"{component_commit}_{component_recursive_hash}.tar.xz"
+    def _binary_archive_filename(component_commit, component_recursive_hash, extension) -> str:
+        return f"{component_commit}_{component_recursive_hash}{extension}"
 
     @staticmethod
     def _hash_material_filename(component_commit, component_recursive_hash) -> str:
@@ -594,11 +556,13 @@ class InstallAction(ActionForBuild):
         """Returns the absolute path to the binary archive that can be extracted to install the target build.
         *Note*: the path may be pointing to a git LFS pointer which needs to be downloaded and checked out (smudged)"""
         binary_archives_path = self.config.binary_archives_dir
+        component_commit = self.component.commit() or "none"
+        # Uncompressed archives are supported too
+        extensions = [archive_format.extension for archive_format in ARCHIVE_FORMATS.values()] + [".tar"]
         for name in self.config.binary_archives_remotes:
-            relative_path_without_extension = os.path.splitext(self.binary_archive_relative_path)[0]
-            extensions = [".xz", ".gz", ""]
             for extension in extensions:
-                try_path = os.path.join(binary_archives_path, name, relative_path_without_extension + extension)
+                filename = self._binary_archive_filename(component_commit, self.component.recursive_hash, extension)
+                try_path = os.path.join(binary_archives_path, name, self.binary_archive_relative_dir, filename)
                 if os.path.exists(try_path):
                     return try_path
         return None
@@ -607,9 +571,27 @@ class InstallAction(ActionForBuild):
         """Returns True if the binary archive for the target build exists (cached or downloadable)"""
         return self.locate_binary_archive() is not None
 
-    @property
-    def environment(self) -> "OrderedDict[str, str]":
-        env = super().environment
+    def estimated_duration(self) -> float:
+        """Estimates the install duration using the time taken by the previous installation, if it came from the same
+        source, or the size of the binary archive otherwise"""
+        binary_archive = None
+        if self.allow_binary_archive:
+            binary_archive = self.locate_binary_archive()
+        source = "binary archives" if binary_archive is not None else "build"
+
+        metadata = self.config.satisfaction_snapshot.installed_metadata(self.component.name)
+        if metadata is not None and metadata.source == source and metadata.install_time is not None:
+            return metadata.install_time
+
+        if binary_archive is not None:
+            pointer = lfs.read_pointer(binary_archive)
+            size = pointer[1] if pointer is not None else os.path.getsize(binary_archive)
+            return size / BINARY_ARCHIVE_THROUGHPUT
+
+        return DEFAULT_BUILD_DURATION
+
+    def _create_environment(self) -> "OrderedDict[str, str]":
+        env = super()._create_environment()
         env["DESTDIR"] = self.tmp_root
         return env
 
@@ -617,10 +599,9 @@ class InstallAction(ActionForBuild):
     def architecture(self):
         return "linux-x86-64"
 
-    def is_satisfied(self):
-        return is_installed(
-            self.config,
-            self.build.component.name,
+    def _is_satisfied(self):
+        return metadata_matches(
+            self.config.satisfaction_snapshot.installed_metadata(self.build.component.name),
             wanted_build=self.build.name,
             wanted_recursive_hash=self.build.component.recursive_hash,
         )
@@ -0,0 +1,280 @@
+import multiprocessing
+import multiprocessing.pool
+import os
+import re
+import stat
+import tempfile
+import threading
+from collections import defaultdict
+from functools import partial
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .rpath import RpathFixResult, fix_rpath
+
+# Actions which can be applied to a file
+DROP_ABSOLUTE_PKGCONFIG_PATHS = 1 << 0
+FIX_SHEBANG = 1 << 1
+REPLACE_NDEBUG = 1 << 2
+REPLACE_ASAN = 1 << 3
+FIX_RPATH = 1 << 4
+
+TEXT_ACTIONS = DROP_ABSOLUTE_PKGCONFIG_PATHS | FIX_SHEBANG | REPLACE_NDEBUG | REPLACE_ASAN
+
+# Below this number of files the overhead of starting the worker processes is not worth it
+PARALLEL_MIN_FILES = 256
+
+
+class PostInstallPool:
+    """Worker processes rewriting the installed files, shared by all the post-install runs.
+
+    A single pool is used for the whole orchestra invocation, so that post-installs running concurrently (with
+    `--jobs`) do not start a set of processes each. The pool is started the first time it is needed.
+    """
+
+    def __init__(self, processes: Optional[int] = None):
+        """
+        :param processes: number of worker processes, defaults to the number of CPUs
+        """
+        self.processes = processes or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def get(self) -> multiprocessing.pool.Pool:
+        with self._lock:
+            if self._pool is None:
+                # Post-install runs while other actions are running in other threads, forking the current process is
+                # not safe
+                self._pool = multiprocessing.get_context("forkserver").Pool(self.processes)
+            return self._pool
+
+    def close(self):
+        """Waits for the worker processes to exit"""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+
+class PostInstallOptions(NamedTuple):
+    # Path of the orchestra root inside the temporary root
+    root: str
+    # Path of the orchestra root the component will be merged into
+    orchestra_root: str
+    # Strings to replace in the dynamic string table of ELF files, in order
+    rpath_search_strings: Tuple[str, ...]
+    ndebug: bool
+    asan: bool
+
+
+class PostInstallResult:
+    def __init__(self):
+        self.purged_libtool_files = 0
+        self.hardlinks_converted = 0
+        self.rewritten_files = 0
+        self.patched_elfs = 0
+        self.skipped_elfs = 0
+
+
+def post_install(options: PostInstallOptions, pool: Optional[PostInstallPool] = None) -> PostInstallResult:
+    """Applies the post-install fixups to the files installed in the temporary root.
+
+    The temporary root is walked only once. Libtool files are purged and hardlinks are converted to symbolic links
+    directly, while the files which need to be rewritten are processed in parallel using `pool`, if given. The
+    timestamps of rewritten files are preserved.
+    """
+    result = PostInstallResult()
+    tasks, libtool_files, hardlinks = _classify_files(options)
+
+    for path in libtool_files:
+        os.unlink(path)
+    result.purged_libtool_files = len(libtool_files)
+
+    # TODO: maybe this should be put into the configuration and not in orchestra itself
+    for equivalent in hardlinks.values():
+        if len(equivalent) < 2:
+            continue
+        base = equivalent.pop()
+        for alternative in equivalent:
+            os.unlink(alternative)
+            os.symlink(os.path.relpath(base, os.path.dirname(alternative)), alternative)
+            # Symbolic links must not be rewritten, their target will be
+            tasks.pop(alternative, None)
+            result.hardlinks_converted += 1
+
+    process_file = partial(_process_file, options)
+    task_list = list(tasks.items())
+    if pool is None or pool.processes == 1 or len(task_list) < PARALLEL_MIN_FILES:
+        outcomes = map(process_file, task_list)
+    else:
+        outcomes = pool.get().imap_unordered(process_file, task_list, chunksize=64)
+    _collect_outcomes(outcomes, result)
+
+    return result
+
+
+def _collect_outcomes(outcomes, result: PostInstallResult):
+    for rewritten, rpath_fix_result in outcomes:
+        result.rewritten_files += rewritten
+        result.patched_elfs += rpath_fix_result == RpathFixResult.PATCHED
+        result.skipped_elfs += rpath_fix_result == RpathFixResult.SKIPPED
+
+
+def _classify_files(options: PostInstallOptions) -> Tuple[Dict[str, int], List[str], Dict[Tuple[int, int], List[str]]]:
+    """Walks the root once and returns:
+    - a dict mapping the path of the files to rewrite to the actions to apply
+    - the list of libtool files to purge
+    - a dict mapping (device, inode) to the paths of regular files with more than one hard link
+    """
+    root = os.path.realpath(options.root)
+    bin_dir = os.path.realpath(os.path.join(root, "bin"))
+    include_dir = os.path.realpath(os.path.join(root, "include"))
+    pkgconfig_dirs = {
+        os.path.realpath(os.path.join(root, "lib", "pkgconfig")),
+        os.path.realpath(os.path.join(root, "share", "pkgconfig")),
+    }
+
+    tasks = {}
+    libtool_files = []
+    hardlinks = defaultdict(list)
+
+    # Each entry is (directory, it is inside a pkgconfig directory, it is inside the include directory)
+    stack = [(root, root in pkgconfig_dirs, root == include_dir)]
+    while stack:
+        directory, in_pkgconfig, in_include = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(
+                    (
+                        entry.path,
+                        in_pkgconfig or entry.path in pkgconfig_dirs,
+                        in_include or entry.path == include_dir,
+                    )
+                )
+                continue
+
+            if not entry.is_file(follow_symlinks=False):
+                continue
+
+            if entry.name.endswith(".la"):
+                libtool_files.append(entry.path)
+                continue
+
+            stat_result = entry.stat(follow_symlinks=False)
+            if stat_result.st_nlink > 1 and stat_result.st_ino != 0:
+                hardlinks[(stat_result.st_dev, stat_result.st_ino)].append(entry.path)
+
+            actions = 0
+            if in_pkgconfig and entry.name.endswith(".pc"):
+                actions |= DROP_ABSOLUTE_PKGCONFIG_PATHS
+            if directory == bin_dir:
+                actions |= FIX_SHEBANG
+            if in_include and entry.name.endswith(".h"):
+                actions |= REPLACE_NDEBUG | REPLACE_ASAN
+            if stat_result.st_mode & (stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH):
+                actions |= FIX_RPATH
+
+            if actions:
+                tasks[entry.path] = actions
+
+    return tasks, libtool_files, hardlinks
+
+
+def _process_file(options: PostInstallOptions, task: Tuple[str, int]) -> Tuple[bool, Optional[RpathFixResult]]:
+    """Applies the requested actions to a file.
+    :returns: a tuple (the file content was rewritten, the result of fixing the RPATH or None)
+    """
+    path, actions = task
+    stat_result = os.lstat(path)
+
+    rewritten = False
+    if actions & TEXT_ACTIONS:
+        rewritten = _rewrite_text(path, actions, options, stat_result)
+
+    rpath_fix_result = None
+    if actions & FIX_RPATH:
+        rpath_fix_result = fix_rpath(path, options.root, options.rpath_search_strings)
+
+    if rewritten or rpath_fix_result == RpathFixResult.PATCHED:
+        os.utime(path, ns=(stat_result.st_atime_ns, stat_result.st_mtime_ns))
+
+    return rewritten, rpath_fix_result
+
+
+def _rewrite_text(path, actions, options: PostInstallOptions, stat_result) -> bool:
+    root = os.fsencode(options.orchestra_root)
+    shebang = b"#!" + root + b"/bin/"
+
+    with open(path, "rb") as f:
+        # Executables in bin/ can be large, only read them if they start with the shebang to fix
+        if actions & TEXT_ACTIONS == FIX_SHEBANG and f.read(len(shebang)) != shebang:
+            return False
+        f.seek(0)
+        content = f.read()
+
+    new_content = content
+
+    if actions & DROP_ABSOLUTE_PKGCONFIG_PATHS:
+        new_content = re.sub(rb"/*" + re.escape(root) + rb"/*", lambda _: b"${pcfiledir}/../..", new_content)
+
+    if actions & FIX_SHEBANG:
+        if new_content.startswith(shebang):
+            new_content = b"#!/usr/bin/env " + new_content[len(shebang) :]
+
+    if actions & REPLACE_NDEBUG:
+        debug, ndebug = (b"0", b"1") if options.ndebug else (b"1", b"0")
+        for pattern, replacement in _ndebug_substitutions(debug, ndebug):
+            new_content = pattern.sub(replacement, new_content)
+
+    if actions & REPLACE_ASAN:
+        replacement = b"1" if options.asan else b"0"
+        for pattern in _asan_patterns:
+            new_content = pattern.sub(lambda match: match.group("before") + replacement, new_content)
+
+    if new_content == content:
+        return False
+
+    # Replace the file like `sed -i` does, so that read-only files can be rewritten too
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".orchestra-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(new_content)
+        os.chmod(tmp_path, stat.S_IMODE(stat_result.st_mode))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    return True
+
+
+# Horizontal whitespace, equivalent to `\s` in sed which works on one line at a time
+_WS = rb"[^\S\n]"
+
+
+def _ndebug_substitutions(debug: bytes, ndebug: bytes):
+    return [
+        (re.compile(rb"^" + _WS + rb"*#" + _WS + rb"*ifndef" + _WS + rb"+NDEBUG", re.M), b"#if " + debug),
+        (re.compile(rb"^" + _WS + rb"*#" + _WS + rb"*ifdef" + _WS + rb"+NDEBUG", re.M), b"#if " + ndebug),
+        (
+            re.compile(rb"^(" + _WS + rb"*#" + _WS + rb"*if" + _WS + rb"+.*)!defined\(NDEBUG\)", re.M),
+            lambda match: match.group(1) + debug,
+        ),
+        (
+            re.compile(rb"^(" + _WS + rb"*#" + _WS + rb"*if" + _WS + rb"+.*)defined\(NDEBUG\)", re.M),
+            lambda match: match.group(1) + ndebug,
+        ),
+    ]
+
+
+# These reproduce the expressions of the sed script used before, where `\(...\)` was a group in a basic regular
+# expression, hence the parentheses are not part of the matched text. Only the first match on each line is replaced.
+_asan_patterns = [
+    re.compile(rb"^(?P<before>.*?)__has_featureaddress_sanitizer", re.M),
+    re.compile(rb"^(?P<before>.*?)defined__SANITIZE_ADDRESS__", re.M),
+]
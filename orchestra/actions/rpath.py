@@ -0,0 +1,146 @@
+import mmap
+import os
+import stat
+import struct
+from enum import Enum
+from typing import Iterable, Optional, Tuple
+
+ELF_MAGIC = b"\x7fELF"
+
+ELFCLASS32 = 1
+ELFCLASS64 = 2
+ELFDATA2LSB = 1
+ELFDATA2MSB = 2
+
+PT_LOAD = 1
+PT_DYNAMIC = 2
+
+DT_NULL = 0
+DT_STRTAB = 5
+DT_STRSZ = 10
+
+
+class RpathFixResult(Enum):
+    # The dynamic string table has been patched
+    PATCHED = "patched"
+    # The file is an ELF, but it is not dynamically linked, its dynamic string table contains none of the search
+    # strings or it could not be parsed
+    SKIPPED = "skipped"
+    # The file is not an ELF
+    NOT_ELF = "not ELF"
+
+
+class _ElfLayout:
+    """Describes how the ELF header, the program headers and the dynamic entries of an ELF class are laid out"""
+
+    def __init__(self, byte_order, header_format, program_header_format, dynamic_entry_format):
+        self.header = struct.Struct(byte_order + header_format)
+        self.program_header = struct.Struct(byte_order + program_header_format)
+        self.dynamic_entry = struct.Struct(byte_order + dynamic_entry_format)
+
+
+# Header fields: e_phoff, e_phentsize, e_phnum (starting after e_ident, e_type, e_machine, e_version and e_entry)
+# Program header fields are normalized by _program_headers to (p_type, p_offset, p_vaddr, p_filesz)
+_LAYOUTS = {
+    (ELFCLASS32, ELFDATA2LSB): _ElfLayout("<", "28xI10xHH", "III4xI12x", "iI"),
+    (ELFCLASS32, ELFDATA2MSB): _ElfLayout(">", "28xI10xHH", "III4xI12x", "iI"),
+    (ELFCLASS64, ELFDATA2LSB): _ElfLayout("<", "32xQ14xHH", "I4xQQ8xQ16x", "qQ"),
+    (ELFCLASS64, ELFDATA2MSB): _ElfLayout(">", "32xQ14xHH", "I4xQQ8xQ16x", "qQ"),
+}
+
+
+def fix_rpath(path: str, root: str, search_strings: Iterable[str]) -> RpathFixResult:
+    """Replaces the search strings in the dynamic string table of an ELF file with paths relative to $ORIGIN.
+
+    The string table is patched in place, so each replacement is padded with slashes to the length of the string it
+    replaces, and search strings shorter than the replacement are left alone. Search strings are replaced in order.
+    :param path: the ELF file to patch
+    :param root: path of the orchestra root, the replacement points to it relative to the directory containing `path`
+    :param search_strings: the strings to replace
+    """
+    try:
+        with open(path, "rb") as elf_file:
+            if elf_file.read(len(ELF_MAGIC)) != ELF_MAGIC:
+                return RpathFixResult.NOT_ELF
+            with mmap.mmap(elf_file.fileno(), 0, access=mmap.ACCESS_READ) as elf:
+                located = _locate_dynstr(elf)
+                if located is None:
+                    return RpathFixResult.SKIPPED
+                offset, size = located
+                original = elf[offset : offset + size]
+    except (ValueError, struct.error):
+        # Truncated or malformed
+        return RpathFixResult.SKIPPED
+
+    replace = b"$ORIGIN/" + os.fsencode(os.path.relpath(root, os.path.dirname(path)))
+    new = original
+    for search_string in search_strings:
+        search_string = os.fsencode(search_string)
+        if len(replace) > len(search_string):
+            continue
+        new = new.replace(search_string, replace + b"/" * (len(search_string) - len(replace)))
+
+    if new == original:
+        return RpathFixResult.SKIPPED
+
+    if not os.access(path, os.W_OK):
+        os.chmod(path, stat.S_IMODE(os.lstat(path).st_mode) | stat.S_IWUSR)
+
+    with open(path, "rb+") as elf_file:
+        with mmap.mmap(elf_file.fileno(), 0) as elf:
+            elf[offset : offset + size] = new
+
+    return RpathFixResult.PATCHED
+
+
+def _locate_dynstr(elf: mmap.mmap) -> Optional[Tuple[int, int]]:
+    """Returns the file offset and the size of the dynamic string table, or None if there is none"""
+    layout = _LAYOUTS.get((elf[4], elf[5]))
+    if layout is None:
+        return None
+
+    program_headers = list(_program_headers(elf, layout))
+    dynamic_segments = [header for header in program_headers if header[0] == PT_DYNAMIC]
+    if len(dynamic_segments) != 1:
+        return None
+
+    _, dynamic_offset, _, dynamic_size = dynamic_segments[0]
+    addresses = []
+    sizes = []
+    end = min(dynamic_offset + dynamic_size, len(elf))
+    for entry_offset in range(dynamic_offset, end - layout.dynamic_entry.size + 1, layout.dynamic_entry.size):
+        tag, value = layout.dynamic_entry.unpack_from(elf, entry_offset)
+        if tag == DT_NULL:
+            break
+        elif tag == DT_STRTAB:
+            addresses.append(value)
+        elif tag == DT_STRSZ:
+            sizes.append(value)
+
+    if len(addresses) != 1 or len(sizes) != 1:
+        return None
+
+    # Translate the virtual address of the string table into a file offset
+    offsets = [
+        address - vaddr + offset
+        for segment_type, offset, vaddr, file_size in program_headers
+        for address in addresses
+        if segment_type == PT_LOAD and vaddr <= address < vaddr + file_size
+    ]
+    if len(offsets) != 1 or offsets[0] + sizes[0] > len(elf):
+        return None
+
+    return offsets[0], sizes[0]
+
+
+def _program_headers(elf: mmap.mmap, layout: _ElfLayout):
+    """Yields (p_type, p_offset, p_vaddr, p_filesz) for each program header"""
+    program_headers_offset, entry_size, entries = layout.header.unpack_from(elf, 0)
+    if entry_size < layout.program_header.size:
+        return
+
+    for i in range(entries):
+        entry_offset = program_headers_offset + i * entry_size
+        if entry_offset + layout.program_header.size > len(elf):
+            return
+        yield layout.program_header.unpack_from(elf, entry_offset)
@@ -0,0 +1,280 @@
+import errno
+import fcntl
+import os
+import shutil
+import stat
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+# ioctl cloning a whole file, see ioctl_ficlone(2)
+FICLONE = 0x40049409
+
+# Errors meaning that the filesystem cannot clone the file, in which case its content is copied
+_CLONE_UNSUPPORTED_ERRORS = {errno.EOPNOTSUPP, errno.ENOTTY, errno.EXDEV, errno.EINVAL, errno.ENOSYS, errno.EBADF}
+
+
+def clone_file(source: str, destination: str):
+    """Copies a regular file, preserving its mode and timestamps.
+    The copy is a reflink (the data is shared until modified) if the filesystem supports it, otherwise the data is
+    copied by the kernel, without going through userspace.
+    """
+    with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+        try:
+            fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+        except OSError as e:
+            if e.errno not in _CLONE_UNSUPPORTED_ERRORS:
+                raise
+            _copy_file_content(source_file, destination_file)
+    shutil.copystat(source, destination)
+
+
+def _copy_file_content(source_file, destination_file):
+    copy_file_range = getattr(os, "copy_file_range", None)
+    if copy_file_range is not None:
+        try:
+            while copy_file_range(source_file.fileno(), destination_file.fileno(), 1 << 30):
+                pass
+            return
+        except OSError as e:
+            if e.errno not in _CLONE_UNSUPPORTED_ERRORS:
+                raise
+            # Restart from scratch with a plain copy
+            source_file.seek(0)
+            destination_file.seek(0)
+            destination_file.truncate()
+    shutil.copyfileobj(source_file, destination_file, 1024 * 1024)
+
+
+def copy_tree(source: str, destination: str) -> List[str]:
+    """Copies a directory tree, cloning regular files (see `clone_file`) and preserving symlinks, hardlinks, modes and
+    timestamps. Existing files in `destination` are replaced.
+    :returns: the paths (relative to `source`) of the copied entries, excluding directories
+    """
+    copied = []
+    # Maps (st_dev, st_ino) of the hardlinked source files to the path of their first copy
+    linked = {}
+    # Directories are created top-down, but their timestamps and modes can only be set after filling them
+    directories = []
+    stack = [""]
+    while stack:
+        relative_directory = stack.pop()
+        source_directory = os.path.join(source, relative_directory)
+        destination_directory = os.path.join(destination, relative_directory)
+        if not os.path.isdir(destination_directory) or os.path.islink(destination_directory):
+            _remove_existing(destination_directory)
+        os.makedirs(destination_directory, exist_ok=True)
+        directories.append(relative_directory)
+
+        with os.scandir(source_directory) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_directory, entry.name)
+                destination_path = os.path.join(destination, relative_path)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(relative_path)
+                    continue
+
+                _remove_existing(destination_path)
+                if entry.is_symlink():
+                    os.symlink(os.readlink(entry.path), destination_path)
+                else:
+                    stat_result = entry.stat(follow_symlinks=False)
+                    inode = (stat_result.st_dev, stat_result.st_ino)
+                    if inode in linked:
+                        os.link(linked[inode], destination_path)
+                    else:
+                        clone_file(entry.path, destination_path)
+                        if stat_result.st_nlink > 1:
+                            linked[inode] = destination_path
+                copied.append(relative_path)
+
+    for relative_directory in reversed(directories):
+        shutil.copystat(os.path.join(source, relative_directory), os.path.join(destination, relative_directory))
+
+    return copied
+
+
+def _remove_existing(path: str):
+    try:
+        mode = os.lstat(path).st_mode
+    except FileNotFoundError:
+        return
+    if stat.S_ISDIR(mode):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+# Number of directories merged concurrently. Merging is mostly bound by filesystem metadata operations
+MERGE_WORKERS = 8
+
+# Errors meaning that a file cannot be renamed into place, in which case it is copied
+_RENAME_UNSUPPORTED_ERRORS = {errno.EXDEV, errno.EACCES, errno.EPERM}
+
+
+class _MergedDirectory:
+    def __init__(self, relative_path: str, stat_result: os.stat_result, moved: bool):
+        self.relative_path = relative_path
+        # Mode and timestamps of the source directory, recorded before moving its content away
+        self.stat = stat_result
+        # True if the whole directory is renamed into place
+        self.moved = moved
+        # Names of the entries to merge, excluding subdirectories
+        self.entries: List[str] = []
+
+
+def merge_tree(source: str, destination: str, move: bool = False):
+    """Merges a directory tree into another one, like `cp -a source/. destination` does.
+    If `move` is True and both trees are on the same filesystem the files are renamed into place, without copying
+    their data, and `source` is left incomplete. Otherwise the files are cloned (see `clone_file`) to a temporary file
+    and then renamed into place, so that the existing files (e.g. running executables) are replaced atomically.
+    Files hardlinked to each other in `source` are hardlinked in `destination` too.
+    The directories are merged concurrently.
+    :raises OSError: if an existing non-directory would be replaced by a directory or vice versa
+    """
+    os.makedirs(destination, exist_ok=True)
+    move = move and os.stat(source).st_dev == os.stat(destination).st_dev
+
+    directories, links = _scan_merged_tree(source, destination, move)
+
+    with ThreadPoolExecutor(max_workers=MERGE_WORKERS) as pool:
+        futures = [
+            pool.submit(_merge_directory, source, destination, directory, move)
+            for directory in directories
+            if directory.entries or directory.moved
+        ]
+        for future in futures:
+            future.result()
+
+    # The other names of hardlinked files are linked to the merged file once it is in place
+    for relative_path, target_relative_path in links:
+        destination_path = os.path.join(destination, relative_path)
+        _check_not_directory(destination_path)
+        _link_into_place(os.path.join(destination, target_relative_path), destination_path)
+
+    # Like `cp -a`, set the mode and timestamps of the directories after filling them, deepest first
+    for directory in reversed(directories):
+        if directory.moved:
+            continue
+        destination_directory = os.path.join(destination, directory.relative_path)
+        os.chmod(destination_directory, stat.S_IMODE(directory.stat.st_mode))
+        os.utime(destination_directory, ns=(directory.stat.st_atime_ns, directory.stat.st_mtime_ns))
+
+
+def _scan_merged_tree(source: str, destination: str, move: bool):
+    """Visits the source tree, creating the missing directories in the destination.
+    Directories which do not exist in the destination are moved as a whole, if moving is allowed.
+    :returns: the directories to merge (parents first) and the hardlinks to create after merging them, as a list of
+              (path, path of the merged file to link to) relative to source
+    """
+    directories = []
+    links = []
+    # Maps (st_dev, st_ino) of the hardlinked files to the first path they were found at
+    linked = {}
+    stack = [""]
+    while stack:
+        relative_directory = stack.pop()
+        source_directory = os.path.join(source, relative_directory)
+        destination_directory = os.path.join(destination, relative_directory)
+        moved = False
+        if os.path.lexists(destination_directory):
+            if os.path.islink(destination_directory) or not os.path.isdir(destination_directory):
+                raise NotADirectoryError(
+                    errno.ENOTDIR, "Cannot overwrite non-directory with directory", destination_directory
+                )
+        elif move:
+            moved = True
+        else:
+            os.mkdir(destination_directory)
+        directory = _MergedDirectory(relative_directory, os.lstat(source_directory), moved)
+        directories.append(directory)
+        if moved:
+            # Renaming the directory moves its whole content
+            continue
+
+        with os.scandir(source_directory) as entries:
+            for entry in entries:
+                relative_path = os.path.join(relative_directory, entry.name)
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(relative_path)
+                    continue
+                if entry.is_file(follow_symlinks=False):
+                    stat_result = entry.stat(follow_symlinks=False)
+                    if stat_result.st_nlink > 1:
+                        inode = (stat_result.st_dev, stat_result.st_ino)
+                        if inode in linked:
+                            links.append((relative_path, linked[inode]))
+                            continue
+                        linked[inode] = relative_path
+                directory.entries.append(entry.name)
+
+    return directories, links
+
+
+def _merge_directory(source: str, destination: str, directory: _MergedDirectory, move: bool):
+    if directory.moved:
+        try:
+            os.rename(os.path.join(source, directory.relative_path), os.path.join(destination, directory.relative_path))
+            return
+        except OSError as e:
+            if e.errno not in _RENAME_UNSUPPORTED_ERRORS:
+                raise
+            copy_tree(os.path.join(source, directory.relative_path), os.path.join(destination, directory.relative_path))
+            return
+
+    for name in directory.entries:
+        source_path = os.path.join(source, directory.relative_path, name)
+        destination_path = os.path.join(destination, directory.relative_path, name)
+        _check_not_directory(destination_path)
+
+        if move:
+            try:
+                os.rename(source_path, destination_path)
+                continue
+            except OSError as e:
+                if e.errno not in _RENAME_UNSUPPORTED_ERRORS:
+                    raise
+
+        _copy_into_place(source_path, destination_path)
+
+
+def _check_not_directory(destination_path: str):
+    if os.path.isdir(destination_path) and not os.path.islink(destination_path):
+        raise IsADirectoryError(errno.EISDIR, "Cannot overwrite directory with non-directory", destination_path)
+
+
+def _copy_into_place(source_path: str, destination_path: str):
+    """Copies a non-directory entry to a temporary file next to the destination, then renames it into place"""
+    mode = os.lstat(source_path).st_mode
+    if stat.S_ISLNK(mode):
+        _replace(destination_path, lambda tmp_path: os.symlink(os.readlink(source_path), tmp_path))
+    elif stat.S_ISREG(mode):
+        _replace(destination_path, lambda tmp_path: clone_file(source_path, tmp_path))
+    else:
+
+        def make_node(tmp_path):
+            os.mknod(tmp_path, mode, os.lstat(source_path).st_rdev)
+            shutil.copystat(source_path, tmp_path)
+
+        _replace(destination_path, make_node)
+
+
+def _link_into_place(target_path: str, destination_path: str):
+    """Hardlinks `target_path` to a temporary file next to the destination, then renames it into place"""
+    _replace(destination_path, lambda tmp_path: os.link(target_path, tmp_path))
+
+
+def _replace(destination_path: str, create):
+    """Creates a file with `create(tmp_path)` next to the destination, then renames it over the destination"""
+    destination_directory, name = os.path.split(destination_path)
+    tmp_path = os.path.join(destination_directory, f".{name}.orchestra-tmp")
+    _remove_existing(tmp_path)
+    try:
+        create(tmp_path)
+        os.rename(tmp_path, destination_path)
+        # Renaming a hardlink over another name of the same file does nothing
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+    except BaseException:
+        if os.path.lexists(tmp_path):
+            os.unlink(tmp_path)
+        raise
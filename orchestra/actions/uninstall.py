@@ -59,6 +59,8 @@ def uninstall(component_name, config):
             logger.debug(f"Removing empty directory {containing_directory}")
             os.rmdir(containing_directory)
 
+    config.file_ownership_index.remove(component_name)
+
     logger.debug(f"Deleting index file {index_path}")
     os.remove(index_path)
 
@@ -30,14 +30,15 @@ def try_run_internal_script(script, environment: OrderedDict = None, cwd=None):
     return _run_internal_script(script, environment=environment, check_returncode=False, cwd=cwd)
 
 
-def run_user_script(script, environment: OrderedDict = None, cwd=None):
+def run_user_script(script, environment: OrderedDict = None, cwd=None, pass_fds=()):
     """Helper for running user scripts.
     If the script returns a nonzero exit code an UserScriptException is raised.
     :param script: the script to run
     :param environment: optional additional environment variables
     :param cwd: if not None, the command is executed in the specified path
+    :param pass_fds: file descriptors inherited by the script
     """
-    _run_user_script(script, environment=environment, check_returncode=True, cwd=cwd)
+    _run_user_script(script, environment=environment, check_returncode=True, cwd=cwd, pass_fds=pass_fds)
 
 
 def run_script(
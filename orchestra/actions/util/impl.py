@@ -49,6 +49,7 @@ def _run_script(
     loglevel="INFO",
     stdout=None,
     stderr=None,
+    pass_fds=(),
 ) -> subprocess.CompletedProcess:
     """Helper for running shell scripts.
     :param script: the script to run
@@ -58,12 +59,13 @@ def _run_script(
     :param loglevel: log debug informations at this level
     :param stdout: passed as the "stdout" parameter to subprocess.run
     :param stderr: passed as the "stderr" parameter to subprocess.run
+    :param pass_fds: passed as the "pass_fds" parameter to subprocess.run
     :return: a subprocess.CompletedProcess instance
     """
 
     script_to_run = _wrap_script(script, environment, strict_flags, cwd)
     logger.log(loglevel, f"The following script is going to be executed:\n{script.strip()}\n")
-    return subprocess.run(["/bin/bash", "-c", script_to_run], stdout=stdout, stderr=stderr)
+    return subprocess.run(["/bin/bash", "-c", script_to_run], stdout=stdout, stderr=stderr, pass_fds=pass_fds)
 
 
 def _exec_script(
@@ -124,13 +126,14 @@ def _run_internal_script(script, environment: OrderedDict = None, check_returnco
     return result.returncode
 
 
-def _run_user_script(script, environment: OrderedDict = None, check_returncode=True, cwd=None):
+def _run_user_script(script, environment: OrderedDict = None, check_returncode=True, cwd=None, pass_fds=()):
     """Helper for running user scripts
     :param script: the script to run
     :param environment: optional additional environment variables
     :param check_returncode: if True, log an error and raise an UserScriptException
                              when the script returns a nonzero exit code
     :param cwd: if not None, the command is executed in the specified path
+    :param pass_fds: file descriptors inherited by the script
     """
 
     if globals.quiet:
@@ -147,6 +150,7 @@ def _run_user_script(script, environment: OrderedDict = None, check_returncode=T
         stdout=stdout,
         stderr=stderr,
         cwd=cwd,
+        pass_fds=pass_fds,
     )
 
     if check_returncode and result.returncode != 0:
@@ -1,7 +1,7 @@
 from loguru import logger
 
 from . import SubCommandParser
-from .common import execution_options
+from .common import execution_options, scheduling_options
 from ..model.configuration import Configuration
 
 
@@ -10,7 +10,7 @@ def install_subcommand(sub_argparser: SubCommandParser):
         "clone",
         handler=handle_clone,
         help="Clone a component",
-        parents=[execution_options],
+        parents=[execution_options, scheduling_options],
     )
     cmd_parser.add_argument("components", nargs="+", help="Name of the components to clone")
     cmd_parser.add_argument("--no-force", action="store_true", help="Don't force execution of the root action")
@@ -35,7 +35,15 @@ def handle_clone(args):
 
     from ..executor import Executor
 
-    executor = Executor(actions, no_force=args.no_force, pretend=args.pretend)
+    executor = Executor(
+        actions,
+        no_force=args.no_force,
+        pretend=args.pretend,
+        jobs=args.jobs,
+        keep_going=args.keep_going,
+        solver=args.solver,
+        plan_cache=config.plan_cache,
+    )
     failed = executor.run()
     exitcode = 1 if failed else 0
     return exitcode
@@ -1,6 +1,11 @@
 import argparse
 
+from ..solvers import BACKTRACKING_SOLVER, SOLVERS
+
 LFS_RETRIES_DEFAULT = 3
+LFS_TRANSFERS_DEFAULT = 8
+JOBS_DEFAULT = 1
+SOLVER_DEFAULT = BACKTRACKING_SOLVER
 
 build_options = argparse.ArgumentParser(add_help=False)
 build_group = build_options.add_argument_group(title="Build options")
@@ -35,3 +40,47 @@ execution_group.add_argument(
     default=LFS_RETRIES_DEFAULT,
     help=f"Retry fetching binary archives up to N times before giving up. Defaults to {LFS_RETRIES_DEFAULT}",
 )
+
+execution_group.add_argument(
+    "--lfs-transfers",
+    metavar="N",
+    type=int,
+    default=LFS_TRANSFERS_DEFAULT,
+    help=f"Download up to N binary archives concurrently. Defaults to {LFS_TRANSFERS_DEFAULT}",
+)
+
+execution_group.add_argument(
+    "--jobs",
+    "-j",
+    metavar="N",
+    type=int,
+    default=JOBS_DEFAULT,
+    help=f"Run up to N actions concurrently. Defaults to {JOBS_DEFAULT}",
+)
+
+execution_group.add_argument(
+    "--keep-going",
+    "-k",
+    action="store_true",
+    help="Keep running the actions which do not depend on the failed ones",
+)
+
+execution_group.add_argument(
+    "--load",
+    "-l",
+    metavar="LOAD",
+    type=float,
+    default=None,
+    help="Do not let make start new jobs if the load average is above LOAD. Requires --jobs greater than 1, ignored "
+    "(with a warning) otherwise",
+)
+
+scheduling_options = argparse.ArgumentParser(add_help=False)
+scheduling_group = scheduling_options.add_argument_group(title="Scheduling options")
+scheduling_group.add_argument(
+    "--solver",
+    choices=SOLVERS,
+    default=SOLVER_DEFAULT,
+    help="Algorithm used to pick the builds satisfying the dependencies. Both pick the same builds, the constraint "
+    f"solver is faster on large configurations. Defaults to {SOLVER_DEFAULT}",
+)
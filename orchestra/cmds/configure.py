@@ -1,7 +1,7 @@
 from loguru import logger
 
 from . import SubCommandParser
-from .common import execution_options, build_options
+from .common import execution_options, build_options, scheduling_options
 from ..gitutils.lfs import assert_lfs_installed
 from ..model.configuration import Configuration
 
@@ -11,7 +11,7 @@ def install_subcommand(sub_argparser: SubCommandParser):
         "configure",
         handler=handle_configure,
         help="Run configure script",
-        parents=[execution_options, build_options],
+        parents=[execution_options, build_options, scheduling_options],
     )
     cmd_parser.add_argument("components", nargs="+", help="Name of the components to configure")
     cmd_parser.add_argument("--no-force", action="store_true", help="Don't force execution of the root action")
@@ -25,7 +25,10 @@ def handle_configure(args):
         use_config_cache=args.config_cache,
         run_tests=args.test,
         max_lfs_retries=args.lfs_retries,
+        lfs_concurrent_transfers=args.lfs_transfers,
         discard_build_directories=args.discard_build_directories,
+        jobs=args.jobs,
+        max_load=args.load,
     )
 
     assert_lfs_installed()
@@ -43,7 +46,16 @@ def handle_configure(args):
 
     from ..executor import Executor
 
-    executor = Executor(actions, no_deps=args.no_deps, no_force=args.no_force, pretend=args.pretend)
+    executor = Executor(
+        actions,
+        no_deps=args.no_deps,
+        no_force=args.no_force,
+        pretend=args.pretend,
+        jobs=args.jobs,
+        keep_going=args.keep_going,
+        solver=args.solver,
+        plan_cache=config.plan_cache,
+    )
 
     failed = executor.run()
     exitcode = 1 if failed else 0
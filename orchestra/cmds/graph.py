@@ -1,7 +1,7 @@
 from loguru import logger
 
 from . import SubCommandParser
-from .common import build_options
+from .common import build_options, scheduling_options
 from ..model.configuration import Configuration
 
 
@@ -10,7 +10,7 @@ def install_subcommand(sub_argparser: SubCommandParser):
         "graph",
         handler=handle_graph,
         help="Print dependency graph (dot format)",
-        parents=[build_options],
+        parents=[build_options, scheduling_options],
     )
     cmd_parser.add_argument("components", nargs="*")
     cmd_parser.add_argument(
@@ -80,7 +80,7 @@ def handle_graph(args):
 
     from ..executor import Executor
 
-    executor = Executor(actions, no_force=args.no_force)
+    executor = Executor(actions, no_force=args.no_force, solver=args.solver, plan_cache=config.plan_cache)
 
     if not args.solved:
         graph = executor._create_initial_dependency_graph()
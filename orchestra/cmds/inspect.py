@@ -14,6 +14,7 @@ def install_subcommand(sub_argparser: SubCommandParser):
     )
     install_config_subcommand(cmd_parser)
     install_component_subcommand(cmd_parser)
+    install_owner_subcommand(cmd_parser)
 
 
 def install_config_subcommand(sub_argparser: SubCommandParser):
@@ -24,6 +25,17 @@ def install_config_subcommand(sub_argparser: SubCommandParser):
     )
 
 
+def install_owner_subcommand(sub_argparser: SubCommandParser):
+    owner_parser = sub_argparser.add_subcmd(
+        "owner",
+        handler=handle_owner,
+        help="Print which installed component owns the specified files",
+    )
+    owner_parser.add_argument(
+        "paths", nargs="+", metavar="PATH", help="Path relative to the orchestra root or absolute"
+    )
+
+
 def install_component_subcommand(sub_argparser: SubCommandParser):
     component_parser = sub_argparser.add_subcmd(
         "component",
@@ -129,6 +141,27 @@ def handle_dependencies(args):
     return 0
 
 
+def handle_owner(args):
+    config = Configuration(use_config_cache=args.config_cache)
+    orchestra_root = os.path.abspath(config.orchestra_root)
+
+    result = 0
+    for path in args.paths:
+        if os.path.isabs(path):
+            path = os.path.relpath(os.path.abspath(path), orchestra_root)
+
+        owner = config.file_ownership_index.owner(path)
+        if owner is None:
+            logger.error(f"{path} does not belong to any installed component")
+            result = 1
+            continue
+
+        component_name, build_name = owner
+        print(f"{path}: {component_name}@{build_name}")
+
+    return result
+
+
 def handle_config(args):
     config = Configuration(use_config_cache=args.config_cache)
     with open(os.path.join(config.cache_dir, "config_cache.yml")) as f:
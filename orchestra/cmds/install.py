@@ -1,7 +1,7 @@
 from loguru import logger
 
 from . import SubCommandParser
-from .common import build_options, execution_options
+from .common import build_options, execution_options, scheduling_options
 from ..actions.uninstall import uninstall
 from ..gitutils.lfs import assert_lfs_installed
 from ..model.configuration import Configuration
@@ -13,7 +13,7 @@ def install_subcommand(sub_argparser: SubCommandParser):
         "install",
         handler=handle_install,
         help="Build and install a component",
-        parents=[build_options, execution_options],
+        parents=[build_options, execution_options, scheduling_options],
     )
     cmd_parser.add_argument("components", nargs="+", help="Name of the components to install")
     cmd_parser.add_argument("--no-force", action="store_true", help="Don't force execution of the root action")
@@ -42,7 +42,10 @@ def handle_install(args):
         keep_tmproot=args.keep_tmproot,
         run_tests=args.test,
         max_lfs_retries=args.lfs_retries,
+        lfs_concurrent_transfers=args.lfs_transfers,
         discard_build_directories=args.discard_build_directories,
+        jobs=args.jobs,
+        max_load=args.load,
     )
 
     assert_lfs_installed()
@@ -78,10 +81,18 @@ def handle_install(args):
 
     from ..executor import Executor
 
-    for action in actions:
-        executor = Executor([action], no_deps=args.no_deps, no_force=args.no_force, pretend=args.pretend)
-        failed = executor.run()
-        if failed:
-            return 1
-
-    return 0
+    # All the requested components are installed according to a single plan, so shared dependencies are only
+    # resolved once
+    executor = Executor(
+        actions,
+        no_deps=args.no_deps,
+        no_force=args.no_force,
+        pretend=args.pretend,
+        jobs=args.jobs,
+        keep_going=args.keep_going,
+        solver=args.solver,
+        plan_cache=config.plan_cache,
+    )
+    failed = executor.run()
+    exitcode = 1 if failed else 0
+    return exitcode
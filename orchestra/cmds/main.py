@@ -38,7 +38,7 @@ config_group.add_argument(
     dest="config_cache",
     default=True,
     action="store_false",
-    help="Do not cache generated yaml configuration",
+    help="Do not cache generated yaml configuration and solved dependency graphs",
 )
 config_group.add_argument(
     "--orchestra-dotdir",
@@ -54,9 +54,13 @@ def handle_shell(args) -> Union[NoReturn, int]:
         logger.error("Current user has no shell available, falling back to /bin/sh")
         user_shell = "/bin/sh"
 
-    env["OLD_HOME"] = os.environ["HOME"]
-    env["HOME"] = os.path.join(os.path.dirname(__file__), "..", "support", "shell-home")
-    env["PS1_PREFIX"] = ps1_prefix
+    env = env.updated(
+        {
+            "OLD_HOME": os.environ["HOME"],
+            "HOME": os.path.join(os.path.dirname(__file__), "..", "support", "shell-home"),
+            "PS1_PREFIX": ps1_prefix,
+        }
+    )
     script = dedent(f"exec {user_shell}")
     exec_script(script, environment=env, loglevel="DEBUG", cwd=cd_to)
     return 0  # This will never be reached in a normal execution, needed for tests
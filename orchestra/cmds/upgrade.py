@@ -1,5 +1,5 @@
 from . import SubCommandParser
-from .common import execution_options, build_options
+from .common import execution_options, build_options, scheduling_options
 from ..model.configuration import Configuration
 from ..model.install_metadata import load_metadata
 
@@ -9,7 +9,7 @@ def install_subcommand(sub_argparser: SubCommandParser):
         "upgrade",
         handler=handle_upgrade,
         help="Upgrade all manually installed components",
-        parents=[execution_options, build_options],
+        parents=[execution_options, build_options, scheduling_options],
     )
 
 
@@ -20,7 +20,10 @@ def handle_upgrade(args):
         use_config_cache=args.config_cache,
         run_tests=args.test,
         max_lfs_retries=args.lfs_retries,
+        lfs_concurrent_transfers=args.lfs_transfers,
         discard_build_directories=args.discard_build_directories,
+        jobs=args.jobs,
+        max_load=args.load,
     )
 
     install_actions = set()
@@ -37,7 +40,15 @@ def handle_upgrade(args):
     args.no_merge = False
     from ..executor import Executor
 
-    executor = Executor(install_actions, no_force=True, pretend=args.pretend)
+    executor = Executor(
+        install_actions,
+        no_force=True,
+        pretend=args.pretend,
+        jobs=args.jobs,
+        keep_going=args.keep_going,
+        solver=args.solver,
+        plan_cache=config.plan_cache,
+    )
     failed = executor.run()
     exitcode = 1 if failed else 0
     return exitcode
@@ -1,6 +1,10 @@
 import graphlib
+import queue
 import sys
+import threading
 from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import nullcontext
 from itertools import permutations, product
 
 import enlighten
@@ -8,35 +12,107 @@ import networkx as nx
 import networkx.classes.filters as nxfilters
 from loguru import logger
 
-from .actions import AnyOfAction
+from .actions import AnyOfAction, InstallAction
 from .actions.action import ActionForBuild
 from .util import set_terminal_title
 from .exceptions import UserException, OrchestraException, InternalException
+from .solvers import BACKTRACKING_SOLVER, CONSTRAINT_SOLVER, SOLVERS
 
 DUMMY_ROOT = "Dummy root"
 
+# Interval (in seconds) between updates of the progress displayed in the status bar
+STATUS_BAR_REFRESH_INTERVAL = 0.5
+
+# Maximum number of orders tried when enforcing the order between the builds of a component
+MAX_GROUP_ORDERS = 1000
+
 
 class Executor:
-    def __init__(self, actions, no_deps=False, no_force=False, pretend=False):
+    def __init__(
+        self,
+        actions,
+        no_deps=False,
+        no_force=False,
+        pretend=False,
+        jobs=1,
+        keep_going=False,
+        solver=BACKTRACKING_SOLVER,
+        plan_cache=None,
+    ):
+        if jobs < 1:
+            raise UserException("The number of jobs must be at least 1")
+        if solver not in SOLVERS:
+            raise UserException(f"Unknown solver {solver}, must be one of {', '.join(SOLVERS)}")
+
         self.actions = actions
         self.no_deps = no_deps
         self.no_force = no_force
         self.pretend = pretend
+        self.jobs = jobs
+        self.keep_going = keep_going
+        self.solver = solver
+        self.plan_cache = plan_cache
 
         self._toposorter = TopologicalSorterWithStatusBar()
+        self._priorities = {}
+        # Actions are marked as started once their worker got a job slot, see _run_action.
+        # Workers put their action in the queue, the main thread moves them to the started set
+        self._slot_acquired = queue.Queue()
+        self._started = set()
+        # Set when no more actions must be run, the workers still waiting for a job slot skip their action
+        self._stop_scheduling = threading.Event()
 
     def run(self):
         dependency_graph = self._create_dependency_graph()
         self._verify_prerequisites(dependency_graph)
         self._init_toposorter(dependency_graph)
+        downloader = None if self.pretend else self._prefetch_binary_archives(dependency_graph)
+        if downloader is not None:
+            self._toposorter.status_callback = downloader.status
+
+        try:
+            # The context manager starts the statusbar and ensures it's stopped on exit
+            with self._toposorter:
+                failed_actions = self._run_actions(stop_on_failure=not self.keep_going)
+        finally:
+            if downloader is not None:
+                downloader.cancel()
+            for config in {action.config for action in self.actions}:
+                config.post_install_pool.close()
+                if config.jobserver is not None:
+                    config.jobserver.close()
+
+        if failed_actions and self.keep_going:
+            self._log_failure_summary(dependency_graph, failed_actions)
 
-        # The context manager starts the statusbar and ensures it's stopped on exit
-        with self._toposorter:
-            return self._run_actions()
+        return failed_actions
+
+    @staticmethod
+    def _prefetch_binary_archives(dependency_graph):
+        """Starts downloading the binary archives needed by the install actions in the background.
+        :returns: the downloader, or None if no binary archive is needed
+        """
+        # Dependencies are run first, so their archives are fetched first. Archives already extracted in the cache are
+        # not needed
+        install_actions = [
+            action
+            for action in reversed(list(nx.topological_sort(dependency_graph)))
+            if isinstance(action, InstallAction)
+            and action.installs_from_binary_archive()
+            and not action.binary_archive_cached()
+        ]
+        if not install_actions:
+            return None
+
+        downloader = install_actions[0].config.binary_archive_downloader
+        downloader.prefetch(action.locate_binary_archive() for action in install_actions)
+        return downloader
 
     def _run_actions(self, stop_on_failure=True):
         """Runs all the actions in the toposorter (in an order that respects dependencies)
-        :arg stop_on_failure: stop execution as soon as one action fails
+        Up to `self.jobs` actions are run concurrently, each one in a worker thread.
+        :arg stop_on_failure: stop scheduling new actions as soon as one action fails. Otherwise, keep running all the
+                              actions which do not depend on the failed ones
         """
         failed_actions = set()
 
@@ -44,29 +120,120 @@ class Executor:
             logger.info("No actions to perform")
 
         ready = set()
-        while self._toposorter.is_active() and (not failed_actions or not stop_on_failure):
-            ready.update(set(self._toposorter.get_ready()))
-            action = sorted(ready, key=lambda action: action.name_for_components)[0]
-            ready.remove(action)
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.jobs) as worker_pool:
+            try:
+                while (
+                    self._toposorter.is_active()
+                    and (not failed_actions or not stop_on_failure)
+                    and not self._stop_scheduling.is_set()
+                ):
+                    ready.update(self._toposorter.get_ready())
+
+                    # Dispatch ready actions until all the workers are busy, starting from the ones on the critical path
+                    while ready and len(running) < self.jobs:
+                        action = min(ready, key=self._scheduling_key)
+                        ready.remove(action)
+                        running[worker_pool.submit(self._run_action, action, stop_on_failure)] = action
+
+                    if not running:
+                        break
+
+                    # Wake up periodically to display the progress reported by the running actions
+                    completed, _ = wait(running, timeout=STATUS_BAR_REFRESH_INTERVAL, return_when=FIRST_COMPLETED)
+                    if completed:
+                        self._collect_completed(completed, running, failed_actions)
+                    else:
+                        self._start_acquired_actions()
+                        self._toposorter.refresh()
+            finally:
+                # Also reached on KeyboardInterrupt, before the worker pool waits for the submitted actions
+                self._stop_scheduling.set()
+
+            # Wait for the actions that were already running when a failure occurred. The ones still waiting for a job
+            # slot are skipped
+            completed, _ = wait(running)
+            self._collect_completed(completed, running, failed_actions)
+
+        return failed_actions
 
+    def _scheduling_key(self, action):
+        """Ready actions with the longest remaining path are run first, ties are broken alphabetically"""
+        return -self._priorities.get(action, 0), action.name_for_components
+
+    def _run_action(self, action, stop_on_failure):
+        """Runs a single action.
+        Called from a worker thread, so all exceptions are logged here.
+        :returns: True if the action completed successfully, False if it failed, None if it was skipped as no more
+                  actions had to be run once it got a job slot
+        """
+        try:
+            explicitly_requested = action in self.actions
+            jobserver = action.config.jobserver
+            # Running actions hold a jobserver slot too, so their `make` invocations share the same budget.
+            # Waiting for the slot may take a while, the action is only displayed as running once it got one
+            with jobserver.job_slot() if jobserver is not None else nullcontext():
+                if self._stop_scheduling.is_set():
+                    return None
+                self._slot_acquired.put(action)
+                try:
+                    action.run(pretend=self.pretend, explicitly_requested=explicitly_requested)
+                except BaseException:
+                    if stop_on_failure:
+                        # Stop while still holding the job slot, so that the workers waiting for it skip their action
+                        self._stop_scheduling.set()
+                    raise
+            return True
+        except OrchestraException as exception:
+            exception.log_error()
+        except:
+            # The call to logger.exception automatically prints the exception info
+            logger.exception(f"An unexpected exception occurred while running {action}")
+        return False
+
+    def _start_acquired_actions(self):
+        """Marks the actions whose worker got a job slot as started. Called from the main thread, as the toposorter is
+        not thread-safe"""
+        while True:
             try:
+                action = self._slot_acquired.get_nowait()
+            except queue.Empty:
+                return
+            self._toposorter.start_jobs(action)
+            self._started.add(action)
+
+    def _collect_completed(self, completed, running, failed_actions):
+        # Workers report acquiring their job slot before completing
+        self._start_acquired_actions()
+        for future in completed:
+            action = running.pop(future)
+            result = future.result()
+            if result is None:
+                logger.debug(f"Skipped {action}")
+                continue
+            if action not in self._started:
+                # The worker failed before getting a job slot
                 self._toposorter.start_jobs(action)
-                explicitly_requested = action in self.actions
-                action.run(pretend=self.pretend, explicitly_requested=explicitly_requested)
+            self._started.discard(action)
+            if result:
                 self._toposorter.done(action)
-            except OrchestraException as exception:
-                exception.log_error()
-                failed_actions.add(action)
-                if stop_on_failure:
-                    break
-            except:
-                # The call to logger.exception automatically prints the exception info
-                logger.exception(f"An unexpected exception occurred while running {action}")
+            else:
+                # Failed actions are never marked as done, so the actions depending on them will never become ready
+                self._toposorter.failed(action)
                 failed_actions.add(action)
-                if stop_on_failure:
-                    break
 
-        return failed_actions
+    @staticmethod
+    def _log_failure_summary(dependency_graph, failed_actions):
+        skipped_actions = set()
+        for action in failed_actions:
+            skipped_actions.update(nx.ancestors(dependency_graph, action))
+        skipped_actions -= failed_actions
+
+        failed_str = "\n".join(sorted(f"  {a.name_for_info}" for a in failed_actions))
+        logger.error(f"The following actions failed:\n{failed_str}")
+        if skipped_actions:
+            skipped_str = "\n".join(sorted(f"  {a.name_for_info}" for a in skipped_actions))
+            logger.error(f"The following actions were skipped as they depend on failed actions:\n{skipped_str}")
 
     def _create_dependency_graph(
         self,
@@ -79,6 +246,25 @@ class Executor:
         # Recursively collect all dependencies of the root action in an initial graph
         dependency_graph = self._create_initial_dependency_graph()
 
+        # Solving the graph is by far the most expensive step, so solved graphs are cached.
+        # Graphs that still contain choices are not cached, as AnyOf nodes cannot be identified by name.
+        plan_key = None
+        if self.plan_cache is not None and simplify_anyof:
+            plan_key = self._plan_cache_key(
+                dependency_graph,
+                remove_unreachable=remove_unreachable,
+                remove_satisfied=remove_satisfied,
+                intra_component_ordering=intra_component_ordering,
+                transitive_reduction=transitive_reduction,
+            )
+        if plan_key is not None:
+            cached_plan = self.plan_cache.load(plan_key)
+            if cached_plan is not None:
+                cached_graph = self._deserialize_plan(cached_plan, dependency_graph)
+                if cached_graph is not None:
+                    logger.debug("Using cached solved dependency graph")
+                    return cached_graph
+
         # Find an assignment for all the choices that ensure the resulting graph is acyclic
         dependency_graph = self._assign_choices(dependency_graph)
         if dependency_graph is None:
@@ -107,8 +293,63 @@ class Executor:
         if transitive_reduction:
             dependency_graph = self._transitive_reduction(dependency_graph)
 
+        if plan_key is not None:
+            self.plan_cache.save(plan_key, self._serialize_plan(dependency_graph))
+
         return dependency_graph
 
+    def _plan_cache_key(self, initial_graph, **options):
+        """Returns the key identifying the solved graph in the plan cache, or None if the graph can't be cached.
+        The solved graph only depends on the configuration (hashed by the cache itself), the options, the requested
+        actions, the structure of the initial graph and on which actions are satisfied. The latter covers both the
+        installed components and their recursive hashes, as well as the presence of sources and build directories.
+        """
+        labels = {node: plan_node_label(node) for node in initial_graph.nodes}
+        if len(set(labels.values())) != len(labels):
+            return None
+
+        nodes = []
+        for node, label in labels.items():
+            satisfied = node.is_satisfied() if node is not DUMMY_ROOT else None
+            successors = sorted(labels[s] for s in initial_graph.successors(node))
+            nodes.append([label, satisfied, successors])
+        nodes.sort()
+
+        key_material = {
+            "requested": sorted(labels[a] for a in self.actions),
+            "no_deps": self.no_deps,
+            "no_force": self.no_force,
+            "solver": self.solver,
+            "options": options,
+            "nodes": nodes,
+        }
+        return self.plan_cache.key(key_material)
+
+    @staticmethod
+    def _serialize_plan(graph):
+        return {
+            "nodes": [plan_node_label(node) for node in graph.nodes],
+            "edges": [[plan_node_label(u), plan_node_label(v), label] for u, v, label in graph.edges(data="label")],
+        }
+
+    @staticmethod
+    def _deserialize_plan(plan, initial_graph):
+        """Rebuilds a solved graph from a cached plan, mapping the names back to the actions of the initial graph.
+        Returns None if the plan references unknown actions.
+        """
+        actions_by_label = {plan_node_label(node): node for node in initial_graph.nodes}
+        graph = nx.DiGraph()
+        try:
+            graph.add_nodes_from(actions_by_label[label] for label in plan["nodes"])
+            for u, v, label in plan["edges"]:
+                if label is not None:
+                    graph.add_edge(actions_by_label[u], actions_by_label[v], label=label)
+                else:
+                    graph.add_edge(actions_by_label[u], actions_by_label[v])
+        except (KeyError, TypeError, ValueError):
+            return None
+        return graph
+
     def _create_initial_dependency_graph(self):
         """Creates the initial dependency graph by collecting all transitive dependencies for the actions the user
         wants to run.
@@ -154,6 +395,9 @@ class Executor:
         search: the choices of disjoint Strongly Connected Components can be assigned independently of one another.
         Intuitively, removing an edge from an SCC cannot create or destroy cycles in another SCC, as they don't share
         any edge.
+
+        With the constraint solver, the search additionally discards partial assignments which cannot be completed
+        (see `is_consistent`). The choices are explored in the same order, so both solvers find the same assignment.
         """
         # Iterate until all the AnyOf nodes have been assigned a choice
         while has_choices(graph):
@@ -180,27 +424,45 @@ class Executor:
     def _assign_strongly_connected_component(self, graph, remaining, strongly_connected_component):
         """Searches for a solution to the given remaining choices in the given SCC
 
+        The search does not modify the graph: choices are recorded in an assignment map, and the graph is only updated
+        once a valid assignment is found.
+
+        :arg graph: the complete dependency graph
+        :arg remaining: list of AnyOf nodes with more than one successor (and therefore need an assignment)
+        :arg strongly_connected_component: the strongly connected component containing the remaining nodes
+        :returns the graph with the assignment applied, or None if no valid assignment exists
+        """
+        assignment = {}
+        reachable = reachable_nodes(graph, assignment, [DUMMY_ROOT])
+
+        if not self._search_assignment(graph, assignment, remaining, reachable, strongly_connected_component):
+            return None
+
+        for any_of, choice in assignment.items():
+            graph.remove_edges_from([(any_of, s) for s in graph.successors(any_of) if s is not choice])
+        return graph
+
+    def _search_assignment(self, graph, assignment, remaining, reachable, strongly_connected_component):
+        """Searches for a valid assignment of the remaining choices, returns True if one was found
+
         This is done via a recursive backtracking search: one of the possible choices is made, then this function
         invokes itself recursively to assign the remaining choices.
         If an invalid choice is found the search resumes from the innermost call which has more options to try.
 
-        :arg graph: the complete dependency graph
+        :arg graph: the complete dependency graph, not modified
+        :arg assignment: dict mapping the AnyOf nodes assigned so far to their choice, updated in place
         :arg remaining: list of AnyOf nodes with more than one successor (and therefore need an assignment)
+        :arg reachable: set of the nodes reachable from the root with the current assignment
         :arg strongly_connected_component: the strongly connected component containing the remaining nodes
         """
-        # TODO: the copy() operation ~halves performance. The other edge/node add/removal
-        #       operations have an impact as well. We can avoid them using filtered views.
-
         # No more choices remain, check if the subgraph of the strongly connected components is cyclic
         if not remaining:
-            subgraph = graph.copy()
-            self._remove_unreachable_actions(subgraph, [DUMMY_ROOT])
-            subgraph = subgraph.subgraph(strongly_connected_component)
-
-            if has_unsatisfied_cycles(subgraph):
-                return None
-            else:
-                return graph
+            subgraph = nx.subgraph_view(
+                graph,
+                filter_node=nxfilters.show_nodes(reachable.intersection(strongly_connected_component)),
+                filter_edge=show_assigned_edges(assignment),
+            )
+            return not has_unsatisfied_cycles(subgraph)
 
         to_assign = remaining.pop()
 
@@ -208,34 +470,46 @@ class Executor:
         alternatives = list(graph.successors(to_assign))
         alternatives.sort(key=keyer(to_assign))
 
-        # Remove all the edges representing alternatives -- they will be added back one at a time to try and see which
-        # represents an admissible assignment
-        graph.remove_edges_from((to_assign, s) for s in alternatives)
-
         for alternative in alternatives:
-            graph.add_edge(to_assign, alternative)
+            assignment[to_assign] = alternative
+            alternative_reachable = update_reachable(
+                graph,
+                assignment,
+                reachable,
+                [a for a in alternatives if a is not alternative],
+            )
 
             # Assigning nodes that are not reachable from the root is pointless
-            _, pointless = filter_out_unreachable(graph, remaining, [DUMMY_ROOT])
+            pointless = [n for n in remaining if n not in alternative_reachable]
             for n in pointless:
                 remaining.remove(n)
 
+            consistent = self.solver != CONSTRAINT_SOLVER or is_consistent(
+                graph,
+                assignment,
+                remaining,
+                strongly_connected_component,
+            )
+
             # Recursive call to assign the remaining choices
-            solved_graph = self._assign_strongly_connected_component(graph, remaining, strongly_connected_component)
-            if solved_graph is None:
-                # No possible assignment of the remaining choices was valid, so our choice was invalid
-                graph.remove_edge(to_assign, alternative)
-
-                # Add back the unreachable nodes
-                for n in pointless:
-                    remaining.append(n)
-            else:
-                return solved_graph
+            if consistent and self._search_assignment(
+                graph,
+                assignment,
+                remaining,
+                alternative_reachable,
+                strongly_connected_component,
+            ):
+                return True
+
+            # No possible assignment of the remaining choices was valid, so our choice was invalid
+            # Add back the unreachable nodes
+            for n in pointless:
+                remaining.append(n)
 
-        # All the choices were tried and no valid solution was found -- return None to the caller to signal this
-        graph.add_edges_from((to_assign, a) for a in alternatives)
+        # All the choices were tried and no valid solution was found -- return False to the caller to signal this
+        del assignment[to_assign]
         remaining.append(to_assign)
-        return None
+        return False
 
     @staticmethod
     def _simplify_anyof_actions(graph):
@@ -307,10 +581,13 @@ class Executor:
         Each group contains:
          1. actions that pertain to a specific build of the component
          2. actions that directly depend on actions of point 1
-        The algorithm tries all possible permutations of the groups in the list.
-        For each permutation [G1, G2, ..., Gn] all actions in
+        The algorithm picks an order of the groups [G1, G2, ..., Gn] and all actions in
         group Gi are marked to depend on all actions in group Gi+1.
         The graph is checked for cycles and if none are found the order is accepted.
+
+        If an action of Gi already depends (even indirectly) on an action of Gj, Gi must precede Gj in the order, as
+        the opposite would introduce a cycle. So the first order tried is a topological sort of the groups according to
+        these constraints, ties are broken by build name. Only if it fails other orders are searched.
         """
         scheduled_actions_per_build = defaultdict(set)
         scheduled_builds_per_component = defaultdict(set)
@@ -328,12 +605,12 @@ class Executor:
             if len(blds) < 2:
                 continue
 
-            for bld in blds:
+            for bld in sorted(blds, key=lambda b: b.name):
                 group = scheduled_actions_per_build[bld].union(scheduled_actions_per_direct_build_dependency[bld])
                 groups_by_component[c].append(group)
 
         for component, group in groups_by_component.items():
-            dependency_graph = self._try_group_orders(dependency_graph, group)
+            dependency_graph = self._try_group_orders(dependency_graph, group, component)
             if dependency_graph is None:
                 raise UserException(
                     f"Could not enforce an order between actions of "
@@ -343,14 +620,21 @@ class Executor:
         return dependency_graph
 
     @staticmethod
-    def _try_group_orders(dependency_graph, group):
-        for permutation in permutations(group):
-            # TODO: duplicating the graph is not good for performance, might be worth removing nodes manually
-            depgraph_copy = dependency_graph.copy()
-
-            for g1, g2 in zip(permutation, permutation[1:]):
+    def _try_group_orders(dependency_graph, group, component):
+        """Enforces the first order of the groups which does not introduce cycles.
+        Returns the modified graph, or None if no order is admissible (the graph is left unmodified)
+        :raises UserException if no admissible order was found within MAX_GROUP_ORDERS attempts
+        """
+        for attempt, order in enumerate(group_orders(dependency_graph, group)):
+            if attempt == MAX_GROUP_ORDERS:
+                raise UserException(
+                    f"Could not enforce an order between actions of component {component} pertaining to multiple "
+                    f"builds, no admissible order was found among the first {MAX_GROUP_ORDERS} tried"
+                )
+            added_edges = []
+            for g1, g2 in zip(order, order[1:]):
                 # Add edge from all nodes in g1 to all nodes in g2
-                for a1, a2 in product(g1, g2):
+                for a1, a2 in product(group[g1], group[g2]):
                     same_action = a1 is a2
                     same_build = (
                         isinstance(a1, ActionForBuild) and isinstance(a2, ActionForBuild) and a1.build is a2.build
@@ -361,13 +645,18 @@ class Executor:
                     # Edges between actions of the same build do not have any advantage in the best case
                     # as depencencies for other actions of the same build do not cause order-of-execution issues,
                     # while in the worst case they introduce unbreakable cycles (install A -> configure A -> install A).
-                    if same_action or same_build:
+                    if same_action or same_build or dependency_graph.has_edge(a1, a2):
                         continue
 
-                    depgraph_copy.add_edge(a1, a2, label="Intra-component ordering")
+                    dependency_graph.add_edge(a1, a2, label="Intra-component ordering")
+                    added_edges.append((a1, a2))
+
+            if not has_unsatisfied_cycles(dependency_graph):
+                return dependency_graph
 
-            if not has_unsatisfied_cycles(depgraph_copy):
-                return depgraph_copy
+            dependency_graph.remove_edges_from(added_edges)
+
+        return None
 
     @staticmethod
     def _transitive_reduction(graph):
@@ -423,15 +712,178 @@ class Executor:
         except graphlib.CycleError as e:
             raise InternalException(f"A cycle was found in the solved dependency graph: {e.args[1]}")
 
+        if self.jobs > 1:
+            self._priorities = critical_path_priorities(dependency_graph)
+
 
 def has_unsatisfied_cycles(graph):
-    simple_cycles = list(nx.simple_cycles(graph))
-    for cycle in simple_cycles:
-        if not all(c.is_satisfied() for c in cycle):
+    """Returns true if the graph contains a cycle through at least one unsatisfied action.
+    Every node of a non-trivial strongly connected component lies on a cycle, so instead of enumerating all the simple
+    cycles (which can be exponentially many) it suffices to look for an unsatisfied node in such components.
+    Note that satisfied nodes cannot simply be removed beforehand, as cycles mixing satisfied and unsatisfied nodes
+    must be detected too.
+    """
+    for component in nx.strongly_connected_components(graph):
+        if len(component) == 1:
+            node = next(iter(component))
+            if not graph.has_edge(node, node):
+                continue
+        if not all(c.is_satisfied() for c in component):
             return True
     return False
 
 
+def is_consistent(graph, assignment, unassigned, strongly_connected_component):
+    """Returns False if a partial assignment of the AnyOf nodes in a SCC cannot be completed without generating an
+    unsatisfied cycle.
+
+    The edges of non-AnyOf nodes and the chosen edges of assigned nodes are present in every complete assignment, and
+    so are the nodes reachable from the root through them. The partial assignment is therefore inconsistent if:
+    - those edges and nodes already form an unsatisfied cycle, or
+    - an unassigned AnyOf node reachable through them has no alternative which can be chosen without forming such a
+      cycle
+
+    :arg graph: the complete dependency graph
+    :arg assignment: dict mapping the assigned AnyOf nodes to their choice
+    :arg unassigned: the AnyOf nodes of the SCC which still need an assignment
+    :arg strongly_connected_component: the strongly connected component the cycles must be found in
+    """
+    unassigned = set(unassigned)
+
+    def fixed_successors(node):
+        if node in unassigned:
+            return ()
+        return assigned_successors(graph, assignment, node)
+
+    def fixed_predecessors(node):
+        for predecessor in graph.pred[node]:
+            if predecessor not in unassigned and assignment.get(predecessor, node) is node:
+                yield predecessor
+
+    def visit(roots, neighbors):
+        visited = set()
+        worklist = [n for n in roots if n in strongly_connected_component]
+        while worklist:
+            node = worklist.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+            worklist.extend(n for n in neighbors(node) if n in strongly_connected_component and n not in visited)
+        return visited
+
+    # Nodes which will be reachable in every complete assignment
+    reachable = set()
+    worklist = [DUMMY_ROOT]
+    while worklist:
+        node = worklist.pop()
+        if node in reachable:
+            continue
+        reachable.add(node)
+        worklist.extend(s for s in fixed_successors(node) if s not in reachable)
+    reachable.intersection_update(strongly_connected_component)
+
+    fixed_subgraph = nx.DiGraph()
+    fixed_subgraph.add_nodes_from(reachable)
+    fixed_subgraph.add_edges_from((u, v) for u in reachable for v in fixed_successors(u) if v in reachable)
+    if has_unsatisfied_cycles(fixed_subgraph):
+        return False
+
+    for any_of in unassigned.intersection(reachable):
+        # Choosing `alternative` closes a cycle if `any_of` can be reached back from it
+        ancestors = visit([any_of], fixed_predecessors)
+        for alternative in graph.successors(any_of):
+            if alternative not in ancestors:
+                break
+            cycle_nodes = visit([alternative], fixed_successors).intersection(ancestors)
+            if all(n.is_satisfied() for n in cycle_nodes):
+                break
+        else:
+            # All the alternatives close an unsatisfied cycle
+            return False
+
+    return True
+
+
+def critical_path_priorities(graph):
+    """Computes the scheduling priority of each action of a DAG.
+    The priority of an action is the estimated duration of the longest chain of actions which cannot start before it
+    completes, the action itself included. Running actions with higher priority first shortens the total run time.
+    :arg graph: the dependency graph, edges go from an action to its dependencies
+    :returns a dict mapping actions to their priority
+    """
+    priorities = {}
+    # Topological order visits each action after all the actions depending on it
+    for action in nx.topological_sort(graph):
+        dependents_priority = max((priorities[d] for d in graph.predecessors(action)), default=0)
+        priorities[action] = action.estimated_duration() + dependents_priority
+    return priorities
+
+
+def group_orders(graph, groups):
+    """Generates the orders (as lists of indices) in which the groups of actions of a component should be tried.
+    An action of one group depending (even indirectly) on an action of another group constrains the first group to
+    come before the second. Actions belonging to both groups are not considered, as they do not get ordered with
+    respect to each other.
+    If the constraints are not contradictory, their topological sort (breaking ties by the order of `groups`) is
+    generated first, followed by all the other orders satisfying them. A constraint can be violated without creating
+    an unsatisfied cycle only if all the actions on the paths between the two groups are satisfied, so the orders which
+    violate only such constraints are generated last. Each order is generated once.
+
+    :arg graph: the dependency graph
+    :arg groups: list of sets of actions
+    """
+    constraints = nx.DiGraph()
+    constraints.add_nodes_from(range(len(groups)))
+    # Constraints due to a path through at least one unsatisfied action
+    unsatisfied_constraints = nx.DiGraph()
+    unsatisfied_constraints.add_nodes_from(range(len(groups)))
+    for (i, group), (j, other_group) in permutations(enumerate(groups), 2):
+        shared = group.intersection(other_group)
+
+        # Search for a path from an action of the first group to one of the other group, preferring the paths through
+        # unsatisfied actions. The worklist contains (action, True if the path to it contains an unsatisfied action)
+        visited = set()
+        worklist = [
+            (d, not action.is_satisfied() or not d.is_satisfied())
+            for action in group - shared
+            for d in graph.successors(action)
+        ]
+        while worklist:
+            dependency, through_unsatisfied = worklist.pop()
+            if (dependency, through_unsatisfied) in visited or (dependency, True) in visited:
+                continue
+            if dependency in other_group and dependency not in shared:
+                constraints.add_edge(i, j)
+                if through_unsatisfied:
+                    unsatisfied_constraints.add_edge(i, j)
+                    break
+            visited.add((dependency, through_unsatisfied))
+            worklist.extend((d, through_unsatisfied or not d.is_satisfied()) for d in graph.successors(dependency))
+
+    generated = set()
+    candidates = []
+    if nx.is_directed_acyclic_graph(constraints):
+        candidates.append([list(nx.lexicographical_topological_sort(constraints))])
+        candidates.append(nx.all_topological_sorts(constraints))
+    if nx.is_directed_acyclic_graph(unsatisfied_constraints):
+        candidates.append(nx.all_topological_sorts(unsatisfied_constraints))
+
+    for orders in candidates:
+        for order in orders:
+            if tuple(order) not in generated:
+                generated.add(tuple(order))
+                yield order
+
+
+def plan_node_label(node):
+    """Returns a name which identifies the node of a dependency graph across orchestra invocations"""
+    if isinstance(node, AnyOfAction):
+        return f"{node!r} preferring {plan_node_label(node.preferred_action)}"
+    elif node is DUMMY_ROOT:
+        return node
+    return node.name_for_info
+
+
 def has_choices(graph):
     """Returns true if a graph contains undecided AnyOf nodes"""
     for node in graph.nodes:
@@ -461,24 +913,70 @@ def keyer(to_assign):
     return _keyer
 
 
-def filter_out_unreachable(graph: nx.DiGraph, nodes, roots):
-    """Filters (separates) reachable nodes from unreachable nodes
-    Returns a tuple of sets, one for the reachable nodes, one for the unreachable ones
-    A node is reachable if there exists a path from any (*not* all) root.
+def show_assigned_edges(assignment):
+    """Returns an edge filter for nx.subgraph_view which hides the edges towards the alternatives not chosen by the
+    assigned AnyOf nodes"""
+
+    def _show_edge(u, v):
+        choice = assignment.get(u)
+        return choice is None or choice is v
+
+    return _show_edge
+
+
+def assigned_successors(graph, assignment, node):
+    """Returns the successors of a node, considering only the chosen successor of the assigned AnyOf nodes"""
+    choice = assignment.get(node)
+    if choice is not None:
+        return (choice,)
+    return graph.succ[node]
+
+
+def reachable_nodes(graph, assignment, roots, within=None):
+    """Returns the set of nodes reachable from any of the roots, considering the given assignment
+    :arg within: if not None, only paths through these nodes are considered
+    """
+    reachable = set()
+    worklist = list(roots)
+    while worklist:
+        node = worklist.pop()
+        if node in reachable:
+            continue
+        reachable.add(node)
+        for successor in assigned_successors(graph, assignment, node):
+            if successor not in reachable and (within is None or successor in within):
+                worklist.append(successor)
+    return reachable
+
+
+def update_reachable(graph, assignment, reachable, removed_successors):
+    """Updates the set of reachable nodes after an AnyOf node has been assigned, dropping its edges towards
+    `removed_successors`.
+    Only the nodes reachable from the removed successors can become unreachable. Among them, the ones still reachable
+    are found by searching from the edges entering them from the unaffected nodes, so the whole graph is not visited
+    again.
+    Returns a new set, `reachable` is not modified.
 
     :arg graph: the graph to operate on
-    :arg nodes: the nodes of interest to filter
-    :arg roots: the root nodes
+    :arg assignment: dict mapping the assigned AnyOf nodes to their choice, already including the new assignment
+    :arg reachable: the set of nodes that were reachable from the root(s) before the new assignment
+    :arg removed_successors: the alternatives which were not chosen
     """
-    shortest_paths = nx.multi_source_dijkstra_path_length(graph, roots)
-    reachable = []
-    unreachable = []
-    for node in nodes:
-        if node not in shortest_paths:
-            unreachable.append(node)
-        else:
-            reachable.append(node)
-    return reachable, unreachable
+    affected = reachable_nodes(graph, assignment, [n for n in removed_successors if n in reachable])
+    if not affected:
+        return reachable
+
+    entry_points = []
+    for node in affected:
+        for predecessor in graph.pred[node]:
+            if predecessor in reachable and predecessor not in affected:
+                choice = assignment.get(predecessor)
+                if choice is None or choice is node:
+                    entry_points.append(node)
+                    break
+    still_reachable = reachable_nodes(graph, assignment, entry_points, within=affected)
+
+    return (reachable - affected) | still_reachable
 
 
 class TopologicalSorterWithStatusBar(graphlib.TopologicalSorter):
@@ -489,6 +987,9 @@ class TopologicalSorterWithStatusBar(graphlib.TopologicalSorter):
         self.__all_nodes = set()
         self.__running = set()
         self.__completed = set()
+        self.__failed = set()
+        # Optionally returns additional information displayed in the status bar
+        self.status_callback = None
 
     def start_jobs(self, *nodes):
         for job in nodes:
@@ -514,6 +1015,16 @@ class TopologicalSorterWithStatusBar(graphlib.TopologicalSorter):
         super().done(*nodes)
         self._update_statusbar()
 
+    def failed(self, *nodes):
+        for job in nodes:
+            try:
+                self.__running.remove(job)
+                self.__failed.add(job)
+            except KeyError:
+                raise OrchestraException(f"Job {job} was never marked as started")
+
+        self._update_statusbar()
+
     def _start_statusbar(self):
         if self.__status_bar:
             raise OrchestraException("Status bar already started")
@@ -536,15 +1047,24 @@ class TopologicalSorterWithStatusBar(graphlib.TopologicalSorter):
         sys.stdout.buffer.flush()
         sys.stderr.buffer.flush()
 
+    def refresh(self):
+        """Updates the status bar, e.g. to display the progress reported by the running jobs"""
+        self._update_statusbar()
+
     def _update_statusbar(self):
-        running_jobs_str = ", ".join(a.name_for_info for a in self.__running)
+        running_jobs_str = ", ".join(
+            f"{a.name_for_info} ({a.progress})" if getattr(a, "progress", None) else a.name_for_info
+            for a in self.__running
+        )
+        extra_status = self.status_callback() if self.status_callback is not None else None
         status_bar_args = {
             "jobs": running_jobs_str,
-            "current": len(self.__completed) + len(self.__running),
+            "current": len(self.__completed) + len(self.__failed) + len(self.__running),
             "total": len(self.__all_nodes),
+            "extra": f" | {extra_status}" if extra_status else "",
         }
         set_terminal_title(f"Running {running_jobs_str}")
-        self.__status_bar.status_format = "[{current}/{total}] Running {jobs}"
+        self.__status_bar.status_format = "[{current}/{total}] Running {jobs}{extra}"
         self.__status_bar.update(**status_bar_args)
         self.__status_bar.refresh()
 
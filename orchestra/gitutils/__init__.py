@@ -1,7 +1,7 @@
 import os
 import re
 from pathlib import Path
-from typing import Optional, Union
+from typing import Dict, Optional, Union
 from loguru import logger
 
 
@@ -18,9 +18,11 @@ def _clean_env(env=None):
 def run_git(
     *args,
     workdir: Optional[Union[str, Path]] = None,
+    additional_environment: Optional[Dict[str, str]] = None,
 ):
     """Run a git command. Raises an InternalSubprocessException if git returns a non-zero exit code.
     :param workdir: Git behaves as if it was invoked in this working directory (optional)
+    :param additional_environment: environment variables set in addition to the current ones (optional)
     """
     git_cmd = [
         "git",
@@ -30,7 +32,10 @@ def run_git(
         git_cmd.append(str(workdir))
     git_cmd.extend(args)
 
-    return run_internal_subprocess(git_cmd, environment=_clean_env())
+    env = _clean_env()
+    if additional_environment:
+        env.update(additional_environment)
+    return run_internal_subprocess(git_cmd, environment=env)
 
 
 def ls_remote(remote):
@@ -1,17 +1,25 @@
+import os
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional, Union
+from typing import List, Optional, Tuple, Union
 
-from . import run_git
+from . import _clean_env, run_git
+from ..actions.util import get_subprocess_output
 from ..exceptions import UserException, InternalSubprocessException
 
 
 _lfs_install_checked = False
 
+# Pointer files are always smaller than this, see git-lfs spec
+_MAX_POINTER_SIZE = 1024
+
 
 def fetch(
     workdir,
     checkout=True,
     include: Optional[List[Union[str, Path]]] = None,
+    concurrent_transfers: Optional[int] = None,
+    progress_file: Optional[str] = None,
 ):
     """
     Fetch (and checkout) git lfs tracked files
@@ -19,33 +27,120 @@ def fetch(
     :param checkout: if True (default), the files are also checked out so their content matches the one tracked by LFS
     :param include: optional list of paths to fetch. Paths must be relative to the repository root. Some shell
              expansions are supported (e.g. *.tar.gz), see `man git-lfs-fetch`.
+    :param concurrent_transfers: optional number of objects downloaded concurrently, overrides
+             `lfs.concurrenttransfers`
+    :param progress_file: optional path of a file where git lfs appends the progress of the transfers, see
+             `parse_progress`
     """
     assert_lfs_installed()
 
     if include is None:
         include = []
 
-    fetch_cmd = [
+    fetch_cmd = []
+    if concurrent_transfers is not None:
+        fetch_cmd += ["-c", f"lfs.concurrenttransfers={concurrent_transfers}"]
+    fetch_cmd += [
         "lfs",
         "fetch",
     ]
     if include:
         fetch_cmd.append("--include")
         fetch_cmd.append(",".join(str(i) for i in include))
-    run_git(*fetch_cmd, workdir=workdir)
+    additional_environment = {"GIT_LFS_PROGRESS": progress_file} if progress_file else None
+    run_git(*fetch_cmd, workdir=workdir, additional_environment=additional_environment)
+
+    if checkout:
+        checkout_files(workdir, include)
 
-    if not checkout:
-        return
 
+def checkout_files(workdir, include: Optional[List[Union[str, Path]]] = None):
+    """
+    Checkout git lfs tracked files which have already been fetched, replacing the pointer files with their content
+    :param workdir: path to the working directory
+    :param include: optional list of paths to checkout, relative to the repository root. All files if not specified
+    """
     checkout_cmd = [
         "lfs",
         "checkout",
     ]
-    for include_file in include:
+    for include_file in include or []:
         checkout_cmd.append(str(include_file))
     run_git(*checkout_cmd, workdir=workdir)
 
 
+def local_object_path(workdir, oid: str, size: int) -> Optional[Path]:
+    """Returns the path of an object in the local LFS storage of a repository, so that its content can be read without
+    checking it out
+    :param workdir: path to the working directory
+    :param oid: sha256 of the object, as returned by `read_pointer`
+    :param size: size of the object, as returned by `read_pointer`
+    :returns: the path to the object, or None if it has not been fetched (or it is incomplete)
+    """
+    media_dir = _local_media_dir(str(workdir))
+    if media_dir is None:
+        return None
+
+    # See "Intercepting Git" in the git-lfs spec
+    path = media_dir / oid[0:2] / oid[2:4] / oid
+    try:
+        if path.stat().st_size != size:
+            return None
+    except OSError:
+        return None
+    return path
+
+
+def parse_progress(line: str) -> Optional[Tuple[str, int, int]]:
+    """Parses a line written by git lfs to the progress file (`GIT_LFS_PROGRESS`).
+    Lines have the format `<direction> <current>/<total files> <transferred>/<total bytes> <path>`.
+    :returns: (path, bytes transferred so far, size) or None if the line is malformed
+    """
+    fields = line.rstrip("\n").split(" ", 3)
+    if len(fields) != 4:
+        return None
+    transferred, _, size = fields[2].partition("/")
+    if not transferred.isdigit() or not size.isdigit():
+        return None
+    return fields[3], int(transferred), int(size)
+
+
+@lru_cache(maxsize=None)
+def _local_media_dir(workdir) -> Optional[Path]:
+    """Returns the directory where git lfs stores the objects of a repository, honoring `lfs.storage`"""
+    env = get_subprocess_output(["git", "-C", str(workdir), "lfs", "env"], environment=_clean_env())
+    for line in env.splitlines():
+        if line.startswith("LocalMediaDir="):
+            media_dir = line[len("LocalMediaDir=") :]
+            return Path(media_dir) if media_dir else None
+    return None
+
+
+def read_pointer(path) -> Optional[Tuple[str, int]]:
+    """Parses a git lfs pointer file
+    :param path: path to the file
+    :returns (oid, size) if the file is a pointer, None if it is not (e.g. it has already been checked out)
+    """
+    try:
+        if os.path.getsize(path) > _MAX_POINTER_SIZE:
+            return None
+        with open(path, "rb") as f:
+            content = f.read().decode("ascii")
+    except (OSError, UnicodeDecodeError):
+        return None
+
+    fields = dict(line.split(" ", 1) for line in content.splitlines() if " " in line)
+    if not fields.get("version", "").startswith("https://git-lfs.github.com/spec/"):
+        return None
+
+    oid = fields.get("oid", "")
+    size = fields.get("size", "")
+    if not oid.startswith("sha256:") or not size.isdigit():
+        return None
+
+    return oid[len("sha256:") :], int(size)
+
+
 def assert_lfs_installed():
     """Checks whether git-lfs is installed and raises an OrchestraException if it is not"""
     global _lfs_install_checked
@@ -0,0 +1,72 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+
+class JobServer:
+    """A GNU make jobserver shared by all the scripts run by orchestra.
+
+    The jobserver is a pipe containing one token (a byte) for each job that can run concurrently, minus the one job
+    that is always allowed to run without a token. Every action run by orchestra occupies a job slot, and `make`
+    invocations found in the scripts take additional tokens from the same pipe, so that the whole process tree
+    shares a single budget of `jobs` concurrent jobs.
+    The pipe is created the first time it is needed, and must be closed once no more actions are run.
+    """
+
+    def __init__(self, jobs: int, max_load: Optional[float] = None):
+        self.jobs = jobs
+        self.max_load = max_load
+
+        # (read fd, write fd) of the pipe, None if it is not open
+        self._pipe: Optional[Tuple[int, int]] = None
+        self._pipe_lock = threading.Lock()
+
+        # The job slot which does not require a token
+        self._implicit_slot = threading.Lock()
+
+    @property
+    def fds(self) -> Tuple[int, int]:
+        """File descriptors that must be inherited by the processes using the jobserver"""
+        with self._pipe_lock:
+            if self._pipe is None:
+                read_fd, write_fd = os.pipe()
+                os.write(write_fd, b"+" * (self.jobs - 1))
+                self._pipe = read_fd, write_fd
+            return self._pipe
+
+    @property
+    def makeflags(self) -> str:
+        """Value of MAKEFLAGS which makes `make` join the jobserver"""
+        read_fd, write_fd = self.fds
+        makeflags = f"-j{self.jobs} --jobserver-auth={read_fd},{write_fd}"
+        if self.max_load is not None:
+            makeflags += f" -l{self.max_load}"
+        return makeflags
+
+    @contextmanager
+    def job_slot(self):
+        """Context manager which blocks until a job slot is available and holds it until exited"""
+        if self._implicit_slot.acquire(blocking=False):
+            try:
+                yield
+            finally:
+                self._implicit_slot.release()
+        else:
+            read_fd, write_fd = self.fds
+            token = os.read(read_fd, 1)
+            try:
+                yield
+            finally:
+                os.write(write_fd, token)
+
+    def close(self):
+        """Closes the pipe. Must not be called while job slots are held, the pipe is created again if needed"""
+        with self._pipe_lock:
+            pipe, self._pipe = self._pipe, None
+        if pipe is not None:
+            for fd in pipe:
+                os.close(fd)
+
+    def __del__(self):
+        self.close()
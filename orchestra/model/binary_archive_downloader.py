@@ -0,0 +1,298 @@
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from ..exceptions import OrchestraException, UserException
+from ..gitutils import get_worktree_root
+from ..gitutils import lfs
+
+# Max number of binary archives fetched with a single `git lfs fetch` invocation
+DOWNLOAD_BATCH_SIZE = 16
+
+# Delay (in seconds) before the first retry of a failed download, doubled at each retry
+RETRY_DELAY = 5
+
+# Interval (in seconds) between progress reports while waiting for a download
+PROGRESS_INTERVAL = 0.5
+
+# The aggregate throughput is averaged over this time window (in seconds)
+THROUGHPUT_WINDOW = 5
+
+
+class _Download:
+    def __init__(self, path: str, root: str, oid: str, size: int):
+        self.path = path
+        self.root = root
+        self.relative_path = os.path.relpath(path, root)
+        self.oid = oid
+        self.size = size
+        self.downloaded = 0
+        self.attempts = 0
+        # Time when the current attempt started transferring data
+        self.started: Optional[float] = None
+        self.finished = threading.Event()
+        self.error: Optional[OrchestraException] = None
+
+    def describe(self) -> str:
+        if self.started is None:
+            return "waiting for download"
+        percentage = 100 * self.downloaded // self.size if self.size else 100
+        elapsed = time.monotonic() - self.started
+        throughput = self.downloaded / elapsed if elapsed > 0 else 0
+        return f"downloading, {percentage}% of {format_size(self.size)}, {format_size(throughput)}/s"
+
+
+class BinaryArchiveDownloader:
+    """Downloads binary archives from git LFS.
+
+    The archives are grouped by binary archives repository and fetched in batches, each batch with a single
+    `git lfs fetch` invocation which transfers up to `concurrent_transfers` objects at a time. Batches for the same
+    repository are fetched one at a time, in the order they were requested, while batches for different repositories
+    are fetched concurrently.
+    When a batch fails only the objects which were not downloaded are retried, each one on its own, so a single failure
+    does not cause the whole batch to be fetched again. Retries are queued once their delay has elapsed, so they do not
+    hold up the other batches of the same repository.
+    The progress of the transfers is read from the progress file written by git lfs (see `GIT_LFS_PROGRESS`).
+    """
+
+    def __init__(self, concurrent_transfers: int, max_attempts: int):
+        self.concurrent_transfers = concurrent_transfers
+        self.max_attempts = max(max_attempts, 1)
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._downloads: Dict[str, _Download] = {}
+        # One worker for each binary archives repository
+        self._pools: Dict[str, ThreadPoolExecutor] = {}
+        # Timers scheduling the retries of failed downloads, by path
+        self._retry_timers: Dict[str, threading.Timer] = {}
+        # Progress files of the running fetches, with the downloads they are transferring and the incomplete last line
+        self._progress_files: Dict[str, list] = {}
+        # (time, bytes downloaded) samples used to compute the aggregate throughput
+        self._samples = deque()
+        self._downloaded_bytes = 0
+
+    def prefetch(self, binary_archive_paths: Iterable[str]):
+        """Starts downloading the given binary archives in the background.
+        :param binary_archive_paths: absolute paths of the binary archives, the ones needed first should come first
+        """
+        self._enqueue(binary_archive_paths)
+
+    def download(self, binary_archive_path: str, progress_callback: Optional[Callable[[str], None]] = None):
+        """Downloads the given binary archive, or waits until it has been downloaded if it was prefetched.
+        Archives which are not LFS pointers (e.g. already checked out) are not downloaded.
+        :param binary_archive_path: absolute path of the binary archive
+        :param progress_callback: called periodically with a short description of the download progress
+        """
+        binary_archive_path = str(binary_archive_path)
+        self._enqueue([binary_archive_path])
+        with self._lock:
+            download = self._downloads.get(binary_archive_path)
+        if download is None:
+            return
+
+        while not download.finished.wait(PROGRESS_INTERVAL):
+            if progress_callback is not None:
+                self._poll_progress()
+                progress_callback(download.describe())
+
+        if download.error is not None:
+            raise download.error
+
+    def status(self) -> Optional[str]:
+        """Returns a short description of the downloads in progress (for the status bar), or None if there are none"""
+        self._poll_progress()
+        with self._lock:
+            downloads = list(self._downloads.values())
+            pending = [d for d in downloads if not d.finished.is_set()]
+            if not pending:
+                return None
+            completed = len(downloads) - len(pending)
+            throughput = self._throughput()
+        return f"LFS {completed}/{len(downloads)}, {format_size(throughput)}/s"
+
+    def cancel(self):
+        """Cancels the downloads which have not been started yet and waits for the running ones.
+        Failed and cancelled downloads are forgotten, so they can be requested again.
+        """
+        self._cancelled.set()
+        with self._lock:
+            pools = list(self._pools.values())
+            self._pools = {}
+            for timer in self._retry_timers.values():
+                timer.cancel()
+            self._retry_timers = {}
+
+        for pool in pools:
+            pool.shutdown(wait=True)
+
+        with self._lock:
+            unfinished = [d for d in self._downloads.values() if not d.finished.is_set()]
+            self._fail_cancelled(unfinished)
+            failed = [d for d in self._downloads.values() if d.error is not None]
+            # Allow downloading them again later
+            for download in failed:
+                del self._downloads[download.path]
+            self._cancelled.clear()
+
+    def _enqueue(self, binary_archive_paths: Iterable[str]):
+        with self._lock:
+            by_repository = OrderedDict()
+            for path in binary_archive_paths:
+                path = str(path)
+                if path in self._downloads:
+                    continue
+                pointer = lfs.read_pointer(path)
+                # Archives which are not LFS pointers have already been checked out
+                if pointer is None:
+                    continue
+                root = str(get_worktree_root(path))
+                download = _Download(path, root, *pointer)
+                self._downloads[path] = download
+                by_repository.setdefault(root, []).append(download)
+
+            for root, downloads in by_repository.items():
+                if root not in self._pools:
+                    self._pools[root] = ThreadPoolExecutor(max_workers=1)
+                for i in range(0, len(downloads), DOWNLOAD_BATCH_SIZE):
+                    batch = downloads[i : i + DOWNLOAD_BATCH_SIZE]
+                    if not self._submit(root, self._fetch_batch, root, batch):
+                        self._fail_cancelled(batch)
+
+        if by_repository:
+            count = sum(len(downloads) for downloads in by_repository.values())
+            logger.debug(f"Queued {count} binary archives for download from {len(by_repository)} repositories")
+
+    def _fetch_batch(self, root: str, batch: List[_Download]):
+        """Fetches a batch of binary archives. Failed downloads are retried one by one, after the other batches"""
+        if self._cancelled.is_set():
+            self._fail_cancelled(batch)
+            return
+
+        error = self._fetch(root, batch)
+        for download in batch:
+            download.attempts += 1
+            # When the fetch fails look for the objects which have been downloaded nonetheless
+            if error is None or lfs.local_object_path(root, download.oid, download.size) is not None:
+                download.finished.set()
+            elif download.attempts >= self.max_attempts:
+                download.error = error or UserException(f"Could not download {download.path}")
+                download.finished.set()
+            else:
+                logger.debug(f"Downloading {download.path} failed, retrying")
+                self._schedule_retry(root, download)
+
+    def _submit(self, root: str, fn, *args) -> bool:
+        """Schedules a task on the worker of a repository. Must hold the lock.
+        :returns: False if the task was not scheduled because the downloads have been cancelled
+        """
+        pool = self._pools.get(root)
+        if pool is None or self._cancelled.is_set():
+            return False
+        try:
+            pool.submit(fn, *args)
+        except RuntimeError:
+            # The worker has been shut down
+            return False
+        return True
+
+    def _schedule_retry(self, root: str, download: _Download):
+        """Queues the download again once the retry delay has elapsed.
+        The worker of the repository keeps fetching the other batches in the meantime.
+        """
+        delay = RETRY_DELAY * 2 ** (download.attempts - 1)
+        with self._lock:
+            if root not in self._pools or self._cancelled.is_set():
+                self._fail_cancelled([download])
+                return
+            timer = threading.Timer(delay, self._retry, (root, download))
+            timer.daemon = True
+            self._retry_timers[download.path] = timer
+            timer.start()
+
+    def _retry(self, root: str, download: _Download):
+        with self._lock:
+            self._retry_timers.pop(download.path, None)
+            if not self._submit(root, self._fetch_batch, root, [download]):
+                self._fail_cancelled([download])
+
+    @staticmethod
+    def _fail_cancelled(downloads: List[_Download]):
+        for download in downloads:
+            download.error = UserException(f"Download of {download.path} cancelled")
+            download.finished.set()
+
+    def _fetch(self, root: str, batch: List[_Download]) -> Optional[OrchestraException]:
+        """Runs `git lfs fetch` for the given downloads, returns the exception raised if it failed"""
+        fd, progress_file = tempfile.mkstemp(prefix="orchestra-lfs-progress-")
+        with self._lock:
+            for download in batch:
+                download.downloaded = 0
+                download.started = None
+            self._progress_files[progress_file] = [os.fdopen(fd, "r"), {d.relative_path: d for d in batch}, ""]
+
+        try:
+            lfs.fetch(
+                root,
+                checkout=False,
+                include=[download.relative_path for download in batch],
+                concurrent_transfers=self.concurrent_transfers,
+                progress_file=progress_file,
+            )
+            return None
+        except OrchestraException as e:
+            return e
+        finally:
+            self._poll_progress()
+            with self._lock:
+                self._progress_files.pop(progress_file)[0].close()
+            os.unlink(progress_file)
+
+    def _poll_progress(self):
+        """Reads the progress files of the running fetches"""
+        with self._lock:
+            now = time.monotonic()
+            for progress in self._progress_files.values():
+                progress_file, downloads, partial_line = progress
+                lines = (partial_line + progress_file.read()).split("\n")
+                # The last line may not have been completely written yet
+                progress[2] = lines.pop()
+
+                for line in lines:
+                    parsed = lfs.parse_progress(line)
+                    if parsed is None:
+                        continue
+                    relative_path, downloaded, _ = parsed
+                    download = downloads.get(relative_path)
+                    if download is None:
+                        continue
+                    if download.started is None:
+                        download.started = now
+                    self._downloaded_bytes += max(downloaded - download.downloaded, 0)
+                    download.downloaded = downloaded
+
+            self._samples.append((now, self._downloaded_bytes))
+            while self._samples[0][0] < now - THROUGHPUT_WINDOW:
+                self._samples.popleft()
+
+    def _throughput(self) -> float:
+        """Returns the aggregate throughput (bytes per second) over the last few seconds. Must hold the lock"""
+        if len(self._samples) < 2:
+            return 0
+        (start_time, start_bytes), (end_time, end_bytes) = self._samples[0], self._samples[-1]
+        if end_time <= start_time:
+            return 0
+        return (end_bytes - start_bytes) / (end_time - start_time)
+
+
+def format_size(size: float) -> str:
+    for unit in ["B", "KiB", "MiB", "GiB"]:
+        if size < 1024:
+            break
+        size /= 1024
+    return f"{size:.1f} {unit}"
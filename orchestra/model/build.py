@@ -3,7 +3,6 @@ from itertools import repeat
 from typing import Union
 
 from . import component as comp
-from ..actions import any_of
 from ..actions import configure
 from ..actions import install
 from ..exceptions import UserException
@@ -69,7 +68,7 @@ class Build:
 
             if not exact_build_required and len(dep_component.builds) > 1:
                 alternatives = {b.install for b in dep_component.builds.values()}
-                dependency_action = any_of.AnyOfAction(alternatives, preferred_build.install)
+                dependency_action = configuration.get_any_of_action(alternatives, preferred_build.install)
             else:
                 dependency_action = preferred_build.install
 
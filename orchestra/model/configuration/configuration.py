@@ -1,5 +1,6 @@
 import os
 import re
+import threading
 import warnings
 from collections import OrderedDict
 from pathlib import Path
@@ -15,11 +16,20 @@ from loguru import logger
 from packaging.version import parse as parse_version
 
 from ._generate import generate_yaml_configuration, validate_configuration_schema
+from ..binary_archive_downloader import BinaryArchiveDownloader
 from ..component import Component
+from ..extracted_archives_cache import ExtractedArchivesCache
+from ..file_ownership import FileOwnershipIndex
+from ..plan_cache import SolvedPlanCache
 from ..remote_cache import RemoteHeadsCache
+from ..satisfaction_snapshot import SatisfactionSnapshot
+from ...actions.any_of import AnyOfAction
+from ...actions.archive import DEFAULT_ARCHIVE_FORMAT, validate_compression_level
+from ...actions.post_install import PostInstallPool
 from ...actions.util import try_run_internal_subprocess, get_subprocess_output
 from ...exceptions import UserException, InternalException
-from ...util import parse_component_name, expand_variables
+from ...jobserver import JobServer
+from ...util import Environment, parse_component_name, expand_variables
 from ...version import __version__, __parsed_version__
 from ... import globals
 
@@ -37,11 +47,20 @@ class Configuration:
         run_tests=False,
         discard_build_directories=False,
         max_lfs_retries=1,
+        lfs_concurrent_transfers=8,
+        jobs=1,
+        max_load=None,
     ):
         self.components: Dict[str, Component] = {}
 
         self.repositories: Dict[str, CloneAction] = {}
 
+        # Cached environment, see global_env
+        self._global_env = None
+
+        # Interned AnyOf actions, see get_any_of_action
+        self._any_of_actions: Dict[tuple, AnyOfAction] = {}
+
         # Allows to trigger a build from source if binary archives are not found
         self.fallback_to_build = fallback_to_build
 
@@ -67,6 +86,28 @@ class Configuration:
         # Discard build directories after a successful build
         self.discard_build_directories = discard_build_directories
 
+        # Serializes the operations modifying the orchestra root (uninstall, merge, metadata update) when actions are
+        # run concurrently
+        self.root_lock = threading.Lock()
+
+        # Jobserver shared with the `make` invocations in the scripts, so that they do not oversubscribe the machine
+        # when actions are run concurrently
+        self.jobserver = JobServer(jobs, max_load) if jobs > 1 else None
+        if max_load is not None and self.jobserver is None:
+            logger.warning("The maximum load (--load) is ignored when running one job at a time, use --jobs")
+
+        # Worker processes for the post-install fixups, bounded by the number of concurrent jobs
+        self.post_install_pool = PostInstallPool(jobs if jobs > 1 else None)
+
+        # Memoizes which actions are satisfied, invalidated whenever an action completes
+        self.satisfaction_snapshot = SatisfactionSnapshot(self)
+
+        # Index of the files owned by the installed components, used to detect conflicts
+        self.file_ownership_index = FileOwnershipIndex(self)
+
+        # Downloads the binary archives, possibly in the background before the actions needing them are run
+        self.binary_archive_downloader = BinaryArchiveDownloader(lfs_concurrent_transfers, max_lfs_retries)
+
         self.orchestra_dotdir = locate_orchestra_dotdir(cwd=override_orchestra_dotdir)
         if not self.orchestra_dotdir:
             raise UserException("Directory .orchestra not found!")
@@ -93,6 +134,10 @@ class Configuration:
 
         self.remotes = self._get_remotes()
         self.binary_archives_remotes = self._get_binary_archives_remotes()
+        # Format and compression level of the binary archives created by this configuration
+        self.binary_archives_format = self.parsed_yaml.get("binary_archives_format", DEFAULT_ARCHIVE_FORMAT)
+        self.binary_archives_compression_level = self.parsed_yaml.get("binary_archives_compression_level")
+        validate_compression_level(self.binary_archives_format, self.binary_archives_compression_level)
         self.branches = self._get_branches()
 
         self._user_paths = self.parsed_yaml.get("paths", {})
@@ -100,6 +145,18 @@ class Configuration:
         remote_heads_cache_path = os.path.join(self.cache_dir, "remote_refs_cache.json")
         self.remote_heads_cache = RemoteHeadsCache(self, remote_heads_cache_path)
 
+        # Cache of the dependency graphs solved by the Executor
+        solved_plans_cache_dir = os.path.join(self.cache_dir, "solved_plans")
+        self.plan_cache = SolvedPlanCache(solved_plans_cache_dir, config_hash) if use_config_cache else None
+
+        # Cache of the trees extracted from binary archives, disabled unless a size is configured
+        extracted_archives_cache_size = self.parsed_yaml.get("extracted_archives_cache_size_mib")
+        self.extracted_archives_cache = None
+        if extracted_archives_cache_size:
+            self.extracted_archives_cache = ExtractedArchivesCache(
+                os.path.join(self.cache_dir, "extracted_archives"), extracted_archives_cache_size * 1024 * 1024
+            )
+
         self._initialize_paths()
         self._parse_components()
 
@@ -138,7 +195,26 @@ class Configuration:
             build = component.default_build
         return build
 
-    def global_env(self) -> "OrderedDict[str, str]":
+    def get_any_of_action(self, alternatives, preferred_action) -> AnyOfAction:
+        """Returns the AnyOf action choosing between the given alternatives.
+        Identical choices required by different builds are interned, so they are represented by a single object.
+        """
+        key = (frozenset(alternatives), preferred_action)
+        any_of_action = self._any_of_actions.get(key)
+        if any_of_action is None:
+            any_of_action = AnyOfAction(alternatives, preferred_action)
+            self._any_of_actions[key] = any_of_action
+        return any_of_action
+
+    def global_env(self) -> Environment:
+        """Returns the environment variables provided to all the scripts.
+        The environment only depends on the configuration, so it is computed once.
+        """
+        if self._global_env is None:
+            self._global_env = Environment(self._create_global_env())
+        return self._global_env
+
+    def _create_global_env(self) -> "OrderedDict[str, str]":
         env = OrderedDict()
         env["ORCHESTRA_DOTDIR"] = self.orchestra_dotdir
         env["ORCHESTRA_ROOT"] = self.orchestra_root
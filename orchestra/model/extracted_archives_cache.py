@@ -0,0 +1,154 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from typing import List, Optional
+
+from loguru import logger
+
+from ..actions.tree_copy import copy_tree
+
+# Names of the files describing each cache entry
+_ENTRY_TREE = "tree"
+_ENTRY_METADATA = "metadata.json"
+
+
+class ExtractedArchivesCache:
+    """Cache of the trees extracted from binary archives, so that reinstalling a build (e.g. when switching back and
+    forth between two builds of a component) does not need to fetch and decompress its binary archive again.
+
+    Entries are keyed by the path of the binary archive (relative to the binary archives repository) and stored in a
+    directory named after its hash, containing the extracted tree and the list of its files. Trees are copied in and
+    out of the cache using reflinks where the filesystem supports them.
+    The least recently used entries are evicted when the total size exceeds `max_size`. The modification time of the
+    entry directory records when it was last used.
+    """
+
+    def __init__(self, path: str, max_size: int):
+        """
+        :param path: directory containing the cache
+        :param max_size: maximum size (in bytes) of the cached trees
+        """
+        self.path = path
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        # Entries being copied out of the cache, not to be evicted
+        self._in_use = set()
+
+    def contains(self, key: str) -> bool:
+        """Returns True if the tree for the given key is cached"""
+        metadata = self._load_metadata(self._entry_path(key))
+        return metadata is not None and metadata.get("key") == key
+
+    def restore(self, key: str, destination: str) -> Optional[List[str]]:
+        """Copies the tree cached for the given key into `destination`.
+        :returns: the paths of the copied files (relative to `destination`), or None if the tree is not cached
+        """
+        entry_path = self._entry_path(key)
+        with self._lock:
+            metadata = self._load_metadata(entry_path)
+            if metadata is None or metadata.get("key") != key:
+                return None
+            self._in_use.add(entry_path)
+
+        try:
+            # Mark the entry as recently used
+            os.utime(entry_path)
+            copy_tree(os.path.join(entry_path, _ENTRY_TREE), destination)
+        except OSError as e:
+            # e.g. the entry was evicted by another orchestra process
+            logger.debug(f"Could not restore {key} from the extracted archives cache: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._in_use.discard(entry_path)
+
+        return metadata["files"]
+
+    def store(self, key: str, source: str, files: List[str]):
+        """Stores a copy of the tree extracted from a binary archive, evicting old entries if needed.
+        :param key: the key of the entry
+        :param source: directory containing the extracted tree
+        :param files: paths (relative to `source`) of the extracted files
+        """
+        size = _tree_size(source)
+        if size > self.max_size:
+            logger.debug(f"Not caching {key}, it is larger than the extracted archives cache")
+            return
+
+        os.makedirs(self.path, exist_ok=True)
+        # The entry is prepared in a temporary directory and then moved into place atomically
+        tmp_entry_path = tempfile.mkdtemp(dir=self.path, prefix=".tmp-")
+        try:
+            copy_tree(source, os.path.join(tmp_entry_path, _ENTRY_TREE))
+            with open(os.path.join(tmp_entry_path, _ENTRY_METADATA), "w") as f:
+                json.dump({"key": key, "size": size, "files": files}, f)
+
+            entry_path = self._entry_path(key)
+            with self._lock:
+                self._evict(self.max_size - size)
+                self._remove_entry(entry_path)
+                os.rename(tmp_entry_path, entry_path)
+        except OSError as e:
+            logger.debug(f"Could not store {key} in the extracted archives cache: {e}")
+        finally:
+            if os.path.exists(tmp_entry_path):
+                _rmtree(tmp_entry_path)
+
+    def _evict(self, max_size: int):
+        """Removes the least recently used entries until the cache size is not greater than `max_size`.
+        Must hold the lock.
+        """
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.startswith(".") or entry.path in self._in_use:
+                continue
+            metadata = self._load_metadata(entry.path)
+            size = metadata["size"] if metadata is not None else 0
+            entries.append((entry.stat().st_mtime, size, entry.path))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry_path in sorted(entries):
+            if total_size <= max_size:
+                break
+            logger.debug(f"Evicting {entry_path} from the extracted archives cache")
+            self._remove_entry(entry_path)
+            total_size -= size
+
+    def _remove_entry(self, entry_path: str):
+        if not os.path.exists(entry_path):
+            return
+        # Rename first, so that the entry disappears atomically
+        tmp_path = tempfile.mkdtemp(dir=self.path, prefix=".evicted-")
+        os.rename(entry_path, os.path.join(tmp_path, "entry"))
+        _rmtree(tmp_path)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.path, hashlib.sha256(key.encode("utf-8")).hexdigest())
+
+    @staticmethod
+    def _load_metadata(entry_path: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(entry_path, _ENTRY_METADATA)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+
+def _tree_size(path: str) -> int:
+    size = 0
+    for directory, _, files in os.walk(path):
+        for name in files:
+            size += os.lstat(os.path.join(directory, name)).st_size
+    return size
+
+
+def _rmtree(path: str):
+    # Archives may contain read-only directories
+    def make_writable_and_retry(function, failed_path, _):
+        os.chmod(os.path.dirname(failed_path), 0o700)
+        function(failed_path)
+
+    shutil.rmtree(path, onerror=make_writable_and_retry)
@@ -0,0 +1,199 @@
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import configuration
+from .install_metadata import installed_component_file_list_path, load_file_list, load_metadata
+
+INDEX_SUFFIX = ".idx"
+
+# Name of the database, stored in the orchestra cache directory
+OWNERSHIP_INDEX_FILENAME = "file_ownership.sqlite"
+
+# Bump when changing the schema, the index will be rebuilt from the file lists
+OWNERSHIP_INDEX_VERSION = 2
+
+# Max number of paths looked up with a single query (SQLite limits the number of parameters)
+QUERY_BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS components (
+    file_list TEXT PRIMARY KEY,
+    component TEXT NOT NULL,
+    build TEXT,
+    file_list_mtime_ns INTEGER NOT NULL,
+    file_list_size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT NOT NULL,
+    component TEXT NOT NULL,
+    PRIMARY KEY (path, component)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_by_component ON files (component);
+CREATE TABLE IF NOT EXISTS properties (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+class FileOwnershipIndex:
+    """Index mapping the paths (relative to the orchestra root) of the installed files to the component owning them.
+
+    The index is a SQLite database stored in the orchestra cache directory, so that the orchestra root only contains
+    files owned by the installed components. The file lists (.idx) remain the source of truth: when the index is opened
+    the file lists which changed since they were indexed (e.g. because they were written by an older orchestra version)
+    are indexed again. The whole index is rebuilt if it was built for a different orchestra root. Afterwards the index
+    is updated transactionally when components are installed or uninstalled.
+    """
+
+    def __init__(self, config: "configuration.Configuration"):
+        self.config = config
+        self._connection: Optional[sqlite3.Connection] = None
+        # Components are installed from worker threads
+        self._lock = threading.Lock()
+
+    @property
+    def path(self):
+        return os.path.join(self.config.cache_dir, OWNERSHIP_INDEX_FILENAME)
+
+    def owners(self, paths: Iterable[str]) -> Dict[str, str]:
+        """Returns a dictionary mapping the given paths which belong to an installed component to their owner"""
+        paths = [_normalize(p) for p in paths]
+        owners = {}
+        with self._lock:
+            connection = self._get_connection()
+            for i in range(0, len(paths), QUERY_BATCH_SIZE):
+                batch = paths[i : i + QUERY_BATCH_SIZE]
+                placeholders = ", ".join("?" * len(batch))
+                owners.update(
+                    connection.execute(f"SELECT path, component FROM files WHERE path IN ({placeholders})", batch)
+                )
+        return owners
+
+    def owner(self, path: str) -> Optional[Tuple[str, Optional[str]]]:
+        """Returns the name of the component and of the build owning the given path, or None if it is not owned"""
+        with self._lock:
+            cursor = self._get_connection().execute(
+                "SELECT files.component, components.build FROM files JOIN components USING (component) "
+                "WHERE files.path = ?",
+                (_normalize(path),),
+            )
+            return cursor.fetchone()
+
+    def files(self, component_name: str) -> List[str]:
+        """Returns the paths owned by the given component"""
+        with self._lock:
+            cursor = self._get_connection().execute(
+                "SELECT path FROM files WHERE component = ? ORDER BY path", (component_name,)
+            )
+            return [path for (path,) in cursor]
+
+    def add(self, component_name: str, build_name: str, paths: Iterable[str]):
+        """Records the files installed by a component. Must be called after writing its file list"""
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                self._index_component(connection, component_name, build_name, paths)
+
+    def remove(self, component_name: str):
+        with self._lock:
+            connection = self._get_connection()
+            with connection:
+                self._remove_component(connection, component_name)
+
+    def _get_connection(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(self.config.installed_component_metadata_dir, exist_ok=True)
+            os.makedirs(self.config.cache_dir, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            with connection:
+                version = connection.execute("PRAGMA user_version").fetchone()[0]
+                if version != OWNERSHIP_INDEX_VERSION:
+                    self._drop_tables(connection)
+                    connection.execute(f"PRAGMA user_version = {OWNERSHIP_INDEX_VERSION}")
+                for statement in SCHEMA.split(";"):
+                    connection.execute(statement)
+
+                # The index is only valid for the orchestra root it was built for
+                metadata_dir = os.path.abspath(self.config.installed_component_metadata_dir)
+                indexed_metadata_dir = connection.execute(
+                    "SELECT value FROM properties WHERE key = 'metadata_dir'"
+                ).fetchone()
+                if indexed_metadata_dir != (metadata_dir,):
+                    connection.execute("DELETE FROM components")
+                    connection.execute("DELETE FROM files")
+                    connection.execute("INSERT OR REPLACE INTO properties VALUES ('metadata_dir', ?)", (metadata_dir,))
+
+                self._synchronize(connection)
+            self._connection = connection
+        return self._connection
+
+    def _synchronize(self, connection: sqlite3.Connection):
+        """Indexes again the file lists which changed since they were last indexed"""
+        indexed = {
+            file_list: (component_name, mtime_ns, size)
+            for file_list, component_name, mtime_ns, size in connection.execute(
+                "SELECT file_list, component, file_list_mtime_ns, file_list_size FROM components"
+            )
+        }
+
+        # File lists are named after the sanitized component name
+        component_names = {
+            os.path.basename(installed_component_file_list_path(name, self.config)): name
+            for name in self.config.components
+        }
+
+        for entry in os.scandir(self.config.installed_component_metadata_dir):
+            if not entry.name.endswith(INDEX_SUFFIX):
+                continue
+
+            stat_result = entry.stat()
+            indexed_entry = indexed.pop(entry.name, None)
+            if indexed_entry is not None and indexed_entry[1:] == (stat_result.st_mtime_ns, stat_result.st_size):
+                continue
+
+            component_name = component_names.get(entry.name, entry.name[: -len(INDEX_SUFFIX)])
+            metadata = load_metadata(component_name, self.config)
+            build_name = metadata.build_name if metadata is not None else None
+            self._index_component(connection, component_name, build_name, load_file_list(component_name, self.config))
+
+        # The file lists of these components have been removed
+        for component_name, _, _ in indexed.values():
+            self._remove_component(connection, component_name)
+
+    def _index_component(self, connection: sqlite3.Connection, component_name, build_name, paths: Iterable[str]):
+        file_list_path = installed_component_file_list_path(component_name, self.config)
+        stat_result = os.stat(file_list_path)
+
+        self._remove_component(connection, component_name)
+        connection.execute(
+            "INSERT INTO components VALUES (?, ?, ?, ?, ?)",
+            (
+                os.path.basename(file_list_path),
+                component_name,
+                build_name,
+                stat_result.st_mtime_ns,
+                stat_result.st_size,
+            ),
+        )
+        connection.executemany(
+            "INSERT OR IGNORE INTO files VALUES (?, ?)",
+            ((_normalize(path), component_name) for path in paths if path.strip()),
+        )
+
+    @staticmethod
+    def _drop_tables(connection: sqlite3.Connection):
+        for table in ["components", "files", "properties"]:
+            connection.execute(f"DROP TABLE IF EXISTS {table}")
+
+    @staticmethod
+    def _remove_component(connection: sqlite3.Connection, component_name):
+        connection.execute("DELETE FROM components WHERE component = ?", (component_name,))
+        connection.execute("DELETE FROM files WHERE component = ?", (component_name,))
+
+
+def _normalize(path: str) -> str:
+    """File lists may contain absolute-looking paths, they are always relative to the orchestra root"""
+    return path.strip().lstrip("/")
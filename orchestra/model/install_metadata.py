@@ -69,6 +69,15 @@ def is_installed(
     :param wanted_recursive_hash: wanted build hash (None means any hash)
     """
     metadata = load_metadata(wanted_component_name, config)
+    return metadata_matches(metadata, wanted_build=wanted_build, wanted_recursive_hash=wanted_recursive_hash)
+
+
+def metadata_matches(metadata: Optional[InstallMetadata], wanted_build=None, wanted_recursive_hash=None) -> bool:
+    """Returns true if the metadata describes an installed component with the given properties.
+    :param metadata: metadata of the installed component, None if the component is not installed
+    :param wanted_build: wanted build name (None means any build)
+    :param wanted_recursive_hash: wanted build hash (None means any hash)
+    """
     if metadata is None:
         return False
 
@@ -0,0 +1,80 @@
+import json
+import os
+from typing import Optional
+
+from loguru import logger
+
+from ._hash import hash
+
+# Bump when the format of the cached plans or of the key material changes
+PLAN_CACHE_VERSION = 1
+
+# Only the most recently used plans are kept
+MAX_CACHED_PLANS = 32
+
+
+class SolvedPlanCache:
+    """Persists the solved dependency graphs computed by the Executor.
+
+    Plans are stored in one file per key. The key is derived from the configuration hash and from the key material
+    provided by the Executor, which must capture everything the solved graph depends on (requested actions, options,
+    the initial dependency graph and the satisfaction state of its actions).
+    """
+
+    def __init__(self, cache_dir, config_hash):
+        self.cache_dir = cache_dir
+        self.config_hash = config_hash
+
+    def key(self, key_material) -> str:
+        serialized_key = json.dumps(
+            {
+                "version": PLAN_CACHE_VERSION,
+                "config_hash": self.config_hash,
+                "key_material": key_material,
+            },
+            sort_keys=True,
+        )
+        return hash(serialized_key)
+
+    def load(self, key) -> Optional[dict]:
+        """Returns the plan cached for the given key, or None if there is none"""
+        plan_path = self._plan_path(key)
+        try:
+            with open(plan_path) as f:
+                plan = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (IOError, json.JSONDecodeError):
+            logger.warning(f"Ignoring invalid cached plan {plan_path}")
+            return None
+
+        # Refresh the modification time, which is used to discard the least recently used plans
+        os.utime(plan_path)
+        return plan
+
+    def save(self, key, plan):
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # Write to a temporary file and rename it so concurrent invocations never read a partially written plan
+        plan_path = self._plan_path(key)
+        tmp_plan_path = f"{plan_path}.{os.getpid()}.tmp"
+        with open(tmp_plan_path, "w") as f:
+            json.dump(plan, f)
+        os.replace(tmp_plan_path, plan_path)
+
+        self._discard_old_plans()
+
+    def _discard_old_plans(self):
+        plans = [entry for entry in os.scandir(self.cache_dir) if entry.name.endswith(".json")]
+        if len(plans) <= MAX_CACHED_PLANS:
+            return
+
+        plans.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in plans[MAX_CACHED_PLANS:]:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+
+    def _plan_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
@@ -0,0 +1,42 @@
+import threading
+from typing import Optional
+
+from . import configuration
+from .install_metadata import InstallMetadata, load_metadata
+
+
+class SatisfactionSnapshot:
+    """Memoizes which actions are satisfied and the metadata of the installed components.
+
+    Checking if an action is satisfied requires accessing the filesystem (install actions parse the metadata of the
+    installed component), and the same actions are checked many times while solving the dependency graph.
+    The snapshot must be invalidated every time the state of the orchestra directories changes, which normally only
+    happens when an action completes.
+    """
+
+    def __init__(self, config: "configuration.Configuration"):
+        self.config = config
+        self._satisfied = {}
+        self._installed_metadata = {}
+        # Actions run concurrently in worker threads, which may invalidate the snapshot
+        self._lock = threading.RLock()
+
+    def is_satisfied(self, action) -> bool:
+        with self._lock:
+            satisfied = self._satisfied.get(action)
+            if satisfied is None:
+                satisfied = action._is_satisfied()
+                self._satisfied[action] = satisfied
+            return satisfied
+
+    def installed_metadata(self, component_name) -> Optional[InstallMetadata]:
+        """Returns the metadata of an installed component, or None if the component is not installed"""
+        with self._lock:
+            if component_name not in self._installed_metadata:
+                self._installed_metadata[component_name] = load_metadata(component_name, self.config)
+            return self._installed_metadata[component_name]
+
+    def invalidate(self):
+        with self._lock:
+            self._satisfied = {}
+            self._installed_metadata = {}
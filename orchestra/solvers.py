@@ -0,0 +1,5 @@
+# Algorithms which can be used to assign the choices of AnyOf nodes, see Executor._assign_choices.
+# Kept separate from the executor so that the command line parser does not need to import it
+BACKTRACKING_SOLVER = "backtracking"
+CONSTRAINT_SOLVER = "constraint"
+SOLVERS = [BACKTRACKING_SOLVER, CONSTRAINT_SOLVER]
@@ -2,7 +2,8 @@ import os
 import re
 import sys
 from collections import OrderedDict
-from typing import Mapping
+from enum import Enum
+from typing import Dict, Mapping
 
 from .exceptions import UserException
 
@@ -14,7 +15,50 @@ def parse_component_name(component_spec):
     return component_name, build_name
 
 
+class Environment(Mapping):
+    """An immutable, ordered set of environment variables.
+
+    Environments are computed once and then shared (e.g. by all the scripts run by an action), so the bash snippet
+    exporting them is cached as well.
+    """
+
+    def __init__(self, variables: Mapping = None):
+        self._variables = OrderedDict(variables or {})
+        self._exported = None
+
+    def __getitem__(self, name):
+        return self._variables[name]
+
+    def __iter__(self):
+        return iter(self._variables)
+
+    def __len__(self):
+        return len(self._variables)
+
+    def __repr__(self):
+        return f"Environment({dict(self._variables)!r})"
+
+    def updated(self, variables: Mapping) -> "Environment":
+        """Returns a new environment with the given variables added on top of this one"""
+        new_variables = OrderedDict(self._variables)
+        new_variables.update(variables)
+        return Environment(new_variables)
+
+    @property
+    def exported(self) -> str:
+        """The bash snippet exporting (or unsetting) the variables"""
+        if self._exported is None:
+            self._exported = _export_variables(self._variables)
+        return self._exported
+
+
 def export_environment(variables: Mapping):
+    if isinstance(variables, Environment):
+        return variables.exported
+    return _export_variables(variables)
+
+
+def _export_variables(variables: Mapping):
     env = ""
     for var, val in variables.items():
         if var.startswith("-"):
@@ -67,3 +111,41 @@ def expand_variables(string: str, additional_environment: "OrderedDict[str, str]
 def set_terminal_title(title):
     if sys.stdout.isatty():
         sys.stdout.write(f"\x1b]2;{title}\x07")
+
+
+class FileType(Enum):
+    REGULAR = "regular"
+    SYMLINK = "symlink"
+    OTHER = "other"
+
+
+def index_directory(root_dir_path: str) -> Dict[str, FileType]:
+    """Returns a dictionary mapping the paths (relative to `root_dir_path`) of all the files found in the directory tree
+    to their type. Everything but real directories is indexed, symlinks (including the ones pointing to directories) are
+    not followed.
+    The tree is visited using os.scandir, which provides the file types without additional system calls.
+    """
+    paths = {}
+    # Stack of (absolute path, path relative to root_dir_path prefix)
+    directories = [(root_dir_path, "")]
+    while directories:
+        directory_path, relative_prefix = directories.pop()
+        try:
+            entries = os.scandir(directory_path)
+        except OSError:
+            # Unreadable directories are skipped, like os.walk does
+            continue
+
+        with entries:
+            for entry in entries:
+                relative_path = relative_prefix + entry.name
+                if entry.is_symlink():
+                    paths[relative_path] = FileType.SYMLINK
+                elif entry.is_dir():
+                    directories.append((entry.path, relative_path + "/"))
+                elif entry.is_file():
+                    paths[relative_path] = FileType.REGULAR
+                else:
+                    paths[relative_path] = FileType.OTHER
+
+    return paths
@@ -23,6 +23,55 @@ def test_binary_archive_location(orchestra: OrchestraShim):
     assert action.binary_archive_relative_path == expected_relative_path
 
 
+def test_binary_archive_format(orchestra: OrchestraShim):
+    """Checks that the binary archive filename reflects the configured format"""
+    orchestra.add_binary_archive("origin")
+    orchestra.add_overlay(
+        dedent(
+            """
+            #@ load("@ytt:overlay", "overlay")
+
+            #@overlay/match by=overlay.all
+            ---
+            #@overlay/match missing_ok=True
+            binary_archives_format: zst
+            """
+        ).lstrip()
+    )
+    orchestra("update")
+    component = orchestra.configuration.components["component_C"]
+    action = component.builds["build0"].install
+
+    assert action.binary_archive_filename.endswith(".tar.zst")
+    assert action.locate_binary_archive() is None
+
+
+def test_installed_binary_archive_path(orchestra: OrchestraShim):
+    """Checks that the metadata records the binary archive which was installed, not the one in the configured format"""
+    orchestra.add_binary_archive("origin")
+    orchestra("update")
+    orchestra("install", "-b", "--create-binary-archives", "component_A")
+    orchestra("uninstall", "component_A")
+
+    orchestra.add_overlay(
+        dedent(
+            """
+            #@ load("@ytt:overlay", "overlay")
+
+            #@overlay/match by=overlay.all
+            ---
+            #@overlay/match missing_ok=True
+            binary_archives_format: zst
+            """
+        ).lstrip()
+    )
+    orchestra("install", "component_A")
+
+    metadata = install_metadata.load_metadata("component_A", orchestra.configuration)
+    assert metadata.source == "binary archives"
+    assert metadata.binary_archive_path.endswith(".tar.xz")
+
+
 def test_binary_archives_creation(orchestra: OrchestraShim):
     """Checks binary archives are created correctly:
     - they are created at the expected location
@@ -76,3 +125,38 @@ def test_remote_heads_cache_poisoning_works(orchestra: OrchestraShim):
     component = orchestra.configuration.components["component_C"]
     assert component.commit() == fake_commit
     assert component.branch() == fake_branch
+
+
+def test_extracted_archives_cache(orchestra: OrchestraShim):
+    """Checks that binary archives installed before are reinstalled from the extracted archives cache"""
+    orchestra.add_binary_archive("origin")
+    orchestra.add_overlay(
+        dedent(
+            """
+            #@ load("@ytt:overlay", "overlay")
+
+            #@overlay/match by=overlay.all
+            ---
+            #@overlay/match missing_ok=True
+            extracted_archives_cache_size_mib: 16
+            """
+        ).lstrip()
+    )
+    orchestra("update")
+    orchestra("install", "-b", "--create-binary-archives", "component_A")
+    orchestra("uninstall", "component_A")
+    # Installing from the binary archive stores the extracted tree in the cache
+    orchestra("install", "component_A")
+    orchestra("uninstall", "component_A")
+
+    # The archive is not read again
+    binary_archive_path = orchestra.configuration.components[
+        "component_A"
+    ].default_build.install.locate_binary_archive()
+    with open(binary_archive_path, "w") as f:
+        f.write("corrupted")
+    orchestra("install", "component_A")
+
+    assert (orchestra.orchestra_root / "component_A_file").exists()
+    metadata = install_metadata.load_metadata("component_A", orchestra.configuration)
+    assert metadata.source == "binary archives"
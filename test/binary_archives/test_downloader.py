@@ -0,0 +1,141 @@
+import hashlib
+import time
+
+import pytest
+
+import orchestra.model.binary_archive_downloader as downloader_module
+from orchestra.exceptions import InternalSubprocessException
+from orchestra.gitutils import lfs
+from orchestra.model.binary_archive_downloader import BinaryArchiveDownloader
+
+
+class FakeLfsRemote:
+    """Stands in for a git LFS server, objects are "downloaded" into a local object storage"""
+
+    def __init__(self, repository, failures=None):
+        self.repository = repository
+        self.objects = {}
+        self.downloaded = set()
+        # Number of times downloading each path fails before succeeding
+        self.failures = failures or {}
+        self.fetches = []
+
+    def add(self, relative_path, content: bytes):
+        oid = hashlib.sha256(content).hexdigest()
+        self.objects[relative_path] = (oid, content)
+        path = self.repository / relative_path
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"version https://git-lfs.github.com/spec/v1\noid sha256:{oid}\nsize {len(content)}\n")
+        return str(path)
+
+    def fetch(self, workdir, checkout=True, include=None, concurrent_transfers=None, progress_file=None):
+        self.fetches.append(sorted(include))
+        failed = False
+        with open(progress_file, "a") as progress:
+            for i, relative_path in enumerate(include):
+                oid, content = self.objects[relative_path]
+                if self.failures.get(relative_path, 0) > 0:
+                    self.failures[relative_path] -= 1
+                    failed = True
+                    continue
+                progress.write(f"download {i + 1}/{len(include)} {len(content)}/{len(content)} {relative_path}\n")
+                self.downloaded.add(oid)
+        if failed:
+            raise InternalSubprocessException(["git", "lfs", "fetch"], exitcode=2)
+
+    def local_object_path(self, workdir, oid, size):
+        return oid if oid in self.downloaded else None
+
+
+@pytest.fixture
+def remote(tmp_path, monkeypatch):
+    (tmp_path / ".git").mkdir()
+    remote = FakeLfsRemote(tmp_path)
+    monkeypatch.setattr(lfs, "fetch", remote.fetch)
+    monkeypatch.setattr(lfs, "local_object_path", remote.local_object_path)
+    monkeypatch.setattr(downloader_module, "RETRY_DELAY", 0)
+    return remote
+
+
+def test_downloads_are_batched(remote):
+    paths = [remote.add(f"archives/{i}.tar.xz", b"content %d" % i) for i in range(3)]
+    downloader = BinaryArchiveDownloader(concurrent_transfers=4, max_attempts=1)
+    downloader.prefetch(paths)
+
+    progress = []
+    for path in paths:
+        downloader.download(path, progress_callback=progress.append)
+    downloader.cancel()
+
+    assert remote.fetches == [[f"archives/{i}.tar.xz" for i in range(3)]]
+    assert downloader.status() is None
+
+
+def test_failed_downloads_are_retried_individually(remote):
+    paths = [remote.add(f"archives/{i}.tar.xz", b"content %d" % i) for i in range(3)]
+    remote.failures = {"archives/1.tar.xz": 1, "archives/2.tar.xz": 5}
+    downloader = BinaryArchiveDownloader(concurrent_transfers=4, max_attempts=2)
+    downloader.prefetch(paths)
+
+    downloader.download(paths[0])
+    downloader.download(paths[1])
+    with pytest.raises(InternalSubprocessException):
+        downloader.download(paths[2])
+    downloader.cancel()
+
+    # The whole batch is fetched once, then only the failed archives are retried
+    assert remote.fetches[0] == [f"archives/{i}.tar.xz" for i in range(3)]
+    assert sorted(remote.fetches[1:]) == [["archives/1.tar.xz"], ["archives/2.tar.xz"]]
+
+
+def test_retries_do_not_block_other_batches(remote, monkeypatch):
+    paths = [remote.add(f"archives/{i}.tar.xz", b"content %d" % i) for i in range(2)]
+    remote.failures = {"archives/0.tar.xz": 1}
+    monkeypatch.setattr(downloader_module, "DOWNLOAD_BATCH_SIZE", 1)
+    monkeypatch.setattr(downloader_module, "RETRY_DELAY", 60)
+    downloader = BinaryArchiveDownloader(concurrent_transfers=4, max_attempts=2)
+    downloader.prefetch(paths)
+
+    # The second batch is fetched while the first one waits to be retried
+    downloader.download(paths[1])
+    # Cancelling does not wait for the pending retry
+    start_time = time.monotonic()
+    downloader.cancel()
+    assert time.monotonic() - start_time < 10
+
+    assert remote.fetches == [["archives/0.tar.xz"], ["archives/1.tar.xz"]]
+
+
+def test_cancel(remote):
+    path = remote.add("archive.tar.xz", b"content")
+    downloader = BinaryArchiveDownloader(concurrent_transfers=4, max_attempts=1)
+    downloader.cancel()
+    downloader.prefetch([path])
+    downloader.download(path)
+    assert remote.fetches == [["archive.tar.xz"]]
+
+
+def test_failed_downloads_can_be_requested_again(remote):
+    path = remote.add("archive.tar.xz", b"content")
+    remote.failures = {"archive.tar.xz": 1}
+    downloader = BinaryArchiveDownloader(concurrent_transfers=4, max_attempts=1)
+    with pytest.raises(InternalSubprocessException):
+        downloader.download(path)
+
+    # The failure is remembered until the downloads are cancelled
+    with pytest.raises(InternalSubprocessException):
+        downloader.download(path)
+    assert len(remote.fetches) == 1
+
+    downloader.cancel()
+    downloader.download(path)
+    assert len(remote.fetches) == 2
+
+
+def test_progress_parsing():
+    assert lfs.parse_progress("download 1/2 512/1024 dir/archive name.tar.xz\n") == (
+        "dir/archive name.tar.xz",
+        512,
+        1024,
+    )
+    assert lfs.parse_progress("garbage") is None
@@ -0,0 +1,73 @@
+import os
+
+from orchestra.actions.tree_copy import copy_tree
+from orchestra.model.extracted_archives_cache import ExtractedArchivesCache, _tree_size
+
+
+def _make_tree(path, content):
+    (path / "lib").mkdir(parents=True)
+    (path / "lib" / "libtest.so.1").write_text(content)
+    (path / "lib" / "libtest.so").symlink_to("libtest.so.1")
+    (path / "bin").mkdir()
+    (path / "bin" / "tool").write_text("tool")
+    os.chmod(path / "bin" / "tool", 0o755)
+
+
+def test_copy_tree(tmp_path):
+    """Checks that trees are copied preserving symlinks, hardlinks and modes, and that existing files are replaced"""
+    source = tmp_path / "source"
+    _make_tree(source, "library")
+    os.link(source / "bin" / "tool", source / "bin" / "tool-alias")
+    destination = tmp_path / "destination"
+    (destination / "lib").mkdir(parents=True)
+    (destination / "lib" / "libtest.so.1").write_text("old library")
+    # A symlink is replaced by the directory with the same name
+    (destination / "bin").symlink_to("lib")
+
+    copied = copy_tree(str(source), str(destination))
+
+    assert sorted(copied) == ["bin/tool", "bin/tool-alias", "lib/libtest.so", "lib/libtest.so.1"]
+    assert (destination / "lib" / "libtest.so.1").read_text() == "library"
+    assert os.readlink(destination / "lib" / "libtest.so") == "libtest.so.1"
+    assert not (destination / "bin").is_symlink()
+    assert os.stat(destination / "bin" / "tool").st_mode & 0o777 == 0o755
+    assert os.stat(destination / "bin" / "tool-alias").st_ino == os.stat(destination / "bin" / "tool").st_ino
+    assert os.stat(destination / "bin" / "tool").st_ino != os.stat(source / "bin" / "tool").st_ino
+
+
+def test_extracted_archives_cache(tmp_path):
+    """Checks that cached trees are restored along with their file list"""
+    cache = ExtractedArchivesCache(str(tmp_path / "cache"), 1024 * 1024)
+    source = tmp_path / "source"
+    _make_tree(source, "library")
+    files = ["lib/libtest.so.1", "lib/libtest.so", "bin/tool"]
+
+    assert cache.restore("a.tar.xz", str(tmp_path / "missing")) is None
+    cache.store("a.tar.xz", str(source), files)
+    assert cache.contains("a.tar.xz")
+
+    destination = tmp_path / "destination"
+    assert cache.restore("a.tar.xz", str(destination)) == files
+    assert (destination / "lib" / "libtest.so.1").read_text() == "library"
+    assert (destination / "lib" / "libtest.so").is_symlink()
+
+
+def test_extracted_archives_cache_eviction(tmp_path):
+    """Checks that the least recently used trees are evicted when the cache is full"""
+    trees = {}
+    for key in ["a", "b", "c"]:
+        trees[key] = tmp_path / key
+        _make_tree(trees[key], key * 1000)
+
+    cache = ExtractedArchivesCache(str(tmp_path / "cache"), 2 * _tree_size(str(trees["a"])))
+    cache.store("a", str(trees["a"]), [])
+    cache.store("b", str(trees["b"]), [])
+    # Make "a" the most recently used tree
+    os.utime(cache._entry_path("b"), (0, 0))
+    assert cache.restore("a", str(tmp_path / "restored")) is not None
+
+    cache.store("c", str(trees["c"]), [])
+
+    assert cache.contains("a")
+    assert not cache.contains("b")
+    assert cache.contains("c")
@@ -1,4 +1,7 @@
+import os
+
 from ..orchestra_shim import OrchestraShim
+from ..utils import git
 import orchestra.gitutils.lfs as lfs
 
 
@@ -10,3 +13,59 @@ def test_lfs_proper_install_detection(orchestra: OrchestraShim, monkeypatch):
     monkeypatch.setenv("HOME", "/tmp")
     lfs._lfs_install_checked = False
     orchestra("install", "-b", "component_C", should_fail=True)
+
+
+def test_install_from_lfs_object_storage(orchestra: OrchestraShim):
+    """Checks that binary archives are extracted from the git LFS object storage, without checking them out"""
+    orchestra.add_binary_archive("origin")
+    orchestra("update")
+    orchestra("install", "-b", "--create-binary-archives", "component_A")
+
+    binary_archive_repo = orchestra.configuration.binary_archives_local_paths["origin"]
+    git.commit_all(binary_archive_repo)
+
+    # Replace the archive with its LFS pointer, the object is kept in the LFS storage
+    binary_archive_path = orchestra.configuration.components[
+        "component_A"
+    ].default_build.install.locate_binary_archive()
+    os.unlink(binary_archive_path)
+    git.run(binary_archive_repo, "checkout", "--", ".", additional_environment={"GIT_LFS_SKIP_SMUDGE": "1"})
+    assert lfs.read_pointer(binary_archive_path) is not None
+
+    orchestra("uninstall", "component_A")
+    orchestra("install", "component_A")
+
+    assert (orchestra.orchestra_root / "component_A_file").exists()
+    assert lfs.read_pointer(binary_archive_path) is not None, "The binary archive should not have been checked out"
+
+
+def test_binary_archives_prefetch(orchestra: OrchestraShim, monkeypatch):
+    """Checks that the binary archives needed by a plan are fetched with a single batched `git lfs fetch`"""
+    orchestra.add_binary_archive("origin")
+    orchestra("update")
+    orchestra("install", "-b", "--create-binary-archives", "component_A", "component_B")
+
+    binary_archive_repo = orchestra.configuration.binary_archives_local_paths["origin"]
+    git.commit_all(binary_archive_repo)
+    for component_name in ["component_A", "component_B"]:
+        component = orchestra.configuration.components[component_name]
+        os.unlink(component.default_build.install.locate_binary_archive())
+    git.run(binary_archive_repo, "checkout", "--", ".", additional_environment={"GIT_LFS_SKIP_SMUDGE": "1"})
+
+    orchestra("uninstall", "component_A")
+    orchestra("uninstall", "component_B")
+
+    fetches = []
+    original_fetch = lfs.fetch
+
+    def fetch(workdir, include=None, **kwargs):
+        fetches.append(sorted(str(path) for path in include))
+        original_fetch(workdir, include=include, **kwargs)
+
+    monkeypatch.setattr(lfs, "fetch", fetch)
+    orchestra("install", "component_A", "component_B")
+
+    assert len(fetches) == 1
+    assert len(fetches[0]) == 2
+    assert (orchestra.orchestra_root / "component_A_file").exists()
+    assert (orchestra.orchestra_root / "component_B_file").exists()
@@ -71,3 +71,18 @@ def test_build_deserialization(orchestra: OrchestraShim):
         component_C.builds["build1"].install,
         build.configure,
     }
+
+
+def test_any_of_interning(orchestra: OrchestraShim):
+    """Checks that identical AnyOf dependencies are represented by a single object"""
+    config = orchestra.configuration
+    component_A = config.components["component_A"]
+    build = config.components["component_G"].builds["build0"]
+
+    any_of_A = config.get_any_of_action(
+        {b.install for b in component_A.builds.values()},
+        component_A.default_build.install,
+    )
+    assert any_of_A == AnyOfAction({b.install for b in component_A.builds.values()}, component_A.default_build.install)
+    assert any(d is any_of_A for d in build.install.dependencies)
+    assert any(d is any_of_A for d in build.configure.dependencies)
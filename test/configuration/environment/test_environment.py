@@ -1,5 +1,9 @@
 from textwrap import dedent
 
+import pytest
+
+from orchestra.util import export_environment
+
 from ...orchestra_shim import OrchestraShim
 from ...fork_shim import ForkShim
 
@@ -47,6 +51,20 @@ def test_user_can_override_environment_variables(orchestra: OrchestraShim):
     assert env["ENV_VAR_A"] == "VAR_A_VALUE"
 
 
+def test_environment_is_cached(orchestra: OrchestraShim):
+    """Checks that environments are computed once and cannot be modified"""
+    config = orchestra.configuration
+    action = config.components["component_A"].default_build.install
+
+    assert config.global_env() is config.global_env()
+    assert action.environment is action.environment
+    assert export_environment(action.environment) is export_environment(action.environment)
+    assert action.environment["ORCHESTRA_ROOT"] == config.global_env()["ORCHESTRA_ROOT"]
+
+    with pytest.raises(TypeError):
+        action.environment["BUILD_DIR"] = "/"
+
+
 def monkeypatch_action_script(action, new_script, monkeypatch_context):
     """Patches the script executed by `action`"""
     # HACK: since `script` is a class @property we can't change it at the instance level
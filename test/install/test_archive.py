@@ -0,0 +1,80 @@
+import shutil
+import subprocess
+import tarfile
+
+import pytest
+
+from orchestra.actions.archive import ARCHIVE_FORMATS, compressor_command, extract_archive, validate_compression_level
+from orchestra.exceptions import InternalSubprocessException, UserException
+
+
+@pytest.mark.parametrize("mode", ["w", "w:gz", "w:bz2", "w:xz"])
+def test_extract_archive(tmp_path, mode):
+    """Checks that archives are extracted and that the extracted files (but not the directories) are returned"""
+    source = tmp_path / "source"
+    (source / "lib").mkdir(parents=True)
+    (source / "lib" / "libtest.so.1").write_text("library")
+    (source / "lib" / "libtest.so").symlink_to("libtest.so.1")
+
+    archive_path = tmp_path / "archive.tar"
+    with tarfile.open(archive_path, mode) as archive:
+        archive.add(str(source), arcname=".")
+
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    # Existing files are replaced
+    (destination / "lib").mkdir()
+    (destination / "lib" / "libtest.so.1").write_text("old library")
+
+    progress = []
+    extracted_files = extract_archive(str(archive_path), str(destination), progress_callback=progress.append)
+
+    assert sorted(extracted_files) == ["lib/libtest.so", "lib/libtest.so.1"]
+    assert (destination / "lib" / "libtest.so.1").read_text() == "library"
+    assert (destination / "lib" / "libtest.so").is_symlink()
+    assert progress[-1] == "extracting, 100%, 2 files"
+
+
+@pytest.mark.parametrize("format_name", ARCHIVE_FORMATS.keys())
+def test_archive_formats(tmp_path, format_name):
+    """Checks that archives created with the compressor of each format can be extracted"""
+    archive_format = ARCHIVE_FORMATS[format_name]
+    if shutil.which(archive_format.decompressor) is None:
+        pytest.skip(f"{archive_format.decompressor} is not available")
+
+    source = tmp_path / "source"
+    source.mkdir()
+    (source / "file").write_text("content")
+
+    archive_path = tmp_path / f"archive{archive_format.extension}"
+    subprocess.check_call(
+        ["tar", "cf", str(archive_path), "-I", compressor_command(format_name, level=1), "file"], cwd=str(source)
+    )
+    assert archive_path.read_bytes().startswith(archive_format.magic)
+
+    destination = tmp_path / "destination"
+    destination.mkdir()
+    assert extract_archive(str(archive_path), str(destination)) == ["file"]
+    assert (destination / "file").read_text() == "content"
+
+
+@pytest.mark.parametrize("format_name", ARCHIVE_FORMATS.keys())
+def test_compression_levels(format_name):
+    """Checks that the compression levels not supported by the compressor are rejected"""
+    archive_format = ARCHIVE_FORMATS[format_name]
+    validate_compression_level(format_name, None)
+    validate_compression_level(format_name, archive_format.max_level)
+    with pytest.raises(UserException):
+        validate_compression_level(format_name, archive_format.max_level + 1)
+
+    if shutil.which(archive_format.decompressor) is not None:
+        command = compressor_command(format_name, level=archive_format.max_level).split()
+        subprocess.run(command, input=b"content", stdout=subprocess.DEVNULL, check=True)
+
+
+def test_extract_corrupted_archive(tmp_path):
+    archive_path = tmp_path / "archive.tar.xz"
+    archive_path.write_bytes(b"\xfd7zXZ\x00" + b"\x00" * 64)
+
+    with pytest.raises(InternalSubprocessException):
+        extract_archive(str(archive_path), str(tmp_path))
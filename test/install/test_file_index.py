@@ -0,0 +1,46 @@
+import os
+
+from orchestra.util import FileType, index_directory
+
+
+def test_index_directory(tmp_path):
+    """Checks that index_directory lists everything but real directories, reporting their type"""
+    (tmp_path / "dir" / "subdir").mkdir(parents=True)
+    (tmp_path / "dir" / "subdir" / "file").touch()
+    (tmp_path / "file").touch()
+    (tmp_path / "file_link").symlink_to("file")
+    (tmp_path / "dir_link").symlink_to("dir")
+    (tmp_path / "broken_link").symlink_to("nonexistent")
+    os.mkfifo(str(tmp_path / "fifo"))
+
+    assert index_directory(str(tmp_path)) == {
+        "dir/subdir/file": FileType.REGULAR,
+        "file": FileType.REGULAR,
+        "file_link": FileType.SYMLINK,
+        "dir_link": FileType.SYMLINK,
+        "broken_link": FileType.SYMLINK,
+        "fifo": FileType.OTHER,
+    }
+    assert index_directory(str(tmp_path / "nonexistent")) == {}
+
+
+def test_index_directory_many_files(tmp_path):
+    """Benchmark: indexing a synthetic temporary root with 100k files and computing the new files must scale linearly"""
+    root = tmp_path / "root"
+    preexisting = {"lib", "share/info/dir"}
+    (root / "share" / "info").mkdir(parents=True)
+    (root / "share" / "info" / "dir").touch()
+    (root / "lib").symlink_to("lib64")
+    pre_file_index = index_directory(str(root))
+
+    expected_new_files = set()
+    for i in range(100):
+        directory = root / "include" / f"dir{i}"
+        directory.mkdir(parents=True)
+        for j in range(1000):
+            (directory / f"header{j}.h").touch()
+            expected_new_files.add(f"include/dir{i}/header{j}.h")
+
+    post_file_index = index_directory(str(root))
+    assert post_file_index.keys() - pre_file_index.keys() == expected_new_files
+    assert set(pre_file_index) == preexisting
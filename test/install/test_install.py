@@ -151,6 +151,42 @@ def test_install_conflicting_builds(orchestra: OrchestraShim):
     assert compare_root_tree(orchestra.orchestra_root, expected_file_list_2)
 
 
+def test_install_file_conflicts(orchestra: OrchestraShim):
+    """Checks that a build installing a file which belongs to another component is not merged into the root"""
+    orchestra("install", "-b", "component_A")
+    orchestra("install", "-b", "component_B@build0", should_fail=True)
+    assert not (orchestra.orchestra_root / "share" / "orchestra" / "component_B.json").exists()
+    assert (orchestra.orchestra_root / "share" / "orchestra" / "component_A.json").exists()
+
+
+def test_install_unowned_file_conflicts(orchestra: OrchestraShim):
+    """Checks that files in the root which do not belong to any component are not overwritten"""
+    orchestra.orchestra_root.mkdir(parents=True, exist_ok=True)
+    (orchestra.orchestra_root / "some_file").write_text("created by hand")
+    orchestra("install", "-b", "component_A", should_fail=True)
+    assert (orchestra.orchestra_root / "some_file").read_text() == "created by hand"
+    assert not (orchestra.orchestra_root / "share" / "orchestra" / "component_A.json").exists()
+
+
+def test_file_ownership_index(orchestra: OrchestraShim):
+    """Checks that the file ownership index is kept up to date and rebuilt from the file lists when missing"""
+    orchestra("install", "-b", "component_A")
+    index = orchestra.configuration.file_ownership_index
+    assert index.owner("some_file") == ("component_A", "build0")
+    assert index.owner("/some_file") == ("component_A", "build0")
+    assert index.owner("missing_file") is None
+    assert "some_file" in index.files("component_A")
+
+    # The index is rebuilt from the file lists of the installed components
+    assert not (orchestra.orchestra_root / "share" / "orchestra" / "file_ownership.sqlite").exists()
+    os.remove(index.path)
+    orchestra("inspect", "owner", "some_file")
+    orchestra("inspect", "owner", "missing_file", should_fail=True)
+
+    orchestra("uninstall", "component_A")
+    orchestra("inspect", "owner", "some_file", should_fail=True)
+
+
 def test_uninstall_dependant_components(orchestra: OrchestraShim):
     """Checks that when installing a component, components that depend on it are uninstalled."""
     orchestra("install", "-b", "dependendant_component")
@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+from orchestra.actions.tree_copy import merge_tree
+
+
+def _make_trees(tmp_path):
+    source = tmp_path / "source"
+    (source / "bin").mkdir(parents=True)
+    (source / "bin" / "tool").write_text("new tool")
+    (source / "lib64").mkdir()
+    (source / "lib64" / "libtest.so.1").write_text("library")
+    (source / "lib").symlink_to("lib64")
+    (source / "share" / "doc" / "test").mkdir(parents=True)
+    (source / "share" / "doc" / "test" / "README").write_text("readme")
+    os.chmod(source / "bin", 0o750)
+
+    destination = tmp_path / "destination"
+    (destination / "bin").mkdir(parents=True)
+    (destination / "bin" / "tool").write_text("old tool")
+    (destination / "bin" / "other").write_text("other")
+    (destination / "lib").symlink_to("lib64")
+    (destination / "share").mkdir()
+    return source, destination
+
+
+@pytest.mark.parametrize("move", [True, False])
+def test_merge_tree(tmp_path, move):
+    """Checks that trees are merged like `cp -a source/. destination` does, moving the files if requested"""
+    source, destination = _make_trees(tmp_path)
+    tool_inode = os.stat(source / "bin" / "tool").st_ino
+
+    merge_tree(str(source), str(destination), move=move)
+
+    assert (destination / "bin" / "tool").read_text() == "new tool"
+    assert (destination / "bin" / "other").read_text() == "other"
+    assert (destination / "lib64" / "libtest.so.1").read_text() == "library"
+    assert os.readlink(destination / "lib") == "lib64"
+    assert (destination / "share" / "doc" / "test" / "README").read_text() == "readme"
+    assert os.stat(destination / "bin").st_mode & 0o777 == 0o750
+    assert not any(name.endswith(".orchestra-tmp") for name in os.listdir(destination / "bin"))
+
+    if move:
+        assert os.stat(destination / "bin" / "tool").st_ino == tool_inode
+        assert not (source / "bin" / "tool").exists()
+    else:
+        assert (source / "bin" / "tool").read_text() == "new tool"
+
+
+def test_merge_tree_type_conflicts(tmp_path):
+    """Checks that directories and non-directories do not replace each other"""
+    source, destination = _make_trees(tmp_path)
+    (destination / "lib64").symlink_to("lib")
+    with pytest.raises(NotADirectoryError):
+        merge_tree(str(source), str(destination))
+
+    source, destination = _make_trees(tmp_path / "other")
+    (destination / "bin" / "tool").unlink()
+    (destination / "bin" / "tool").mkdir()
+    with pytest.raises(IsADirectoryError):
+        merge_tree(str(source), str(destination))
+
+
+@pytest.mark.parametrize("move", [True, False])
+def test_merge_tree_hardlinks(tmp_path, move):
+    """Checks that files hardlinked to each other are still hardlinked after merging, also in directories moved as a
+    whole"""
+    source, destination = _make_trees(tmp_path)
+    os.link(source / "bin" / "tool", source / "bin" / "tool-alias")
+    os.link(source / "bin" / "tool", source / "lib64" / "tool-alias")
+    os.link(source / "share" / "doc" / "test" / "README", source / "share" / "doc" / "test" / "README-alias")
+    (destination / "bin" / "tool-alias").write_text("old alias")
+
+    merge_tree(str(source), str(destination), move=move)
+
+    tool_inode = os.stat(destination / "bin" / "tool").st_ino
+    assert os.stat(destination / "bin" / "tool-alias").st_ino == tool_inode
+    assert os.stat(destination / "lib64" / "tool-alias").st_ino == tool_inode
+    assert (destination / "bin" / "tool-alias").read_text() == "new tool"
+    readme_inode = os.stat(destination / "share" / "doc" / "test" / "README").st_ino
+    assert os.stat(destination / "share" / "doc" / "test" / "README-alias").st_ino == readme_inode
+    assert not any(name.endswith(".orchestra-tmp") for name in os.listdir(destination / "bin"))
@@ -1,6 +1,7 @@
 import re
 import subprocess
 
+from orchestra.actions.post_install import PARALLEL_MIN_FILES, PostInstallOptions, PostInstallPool, post_install
 from ..orchestra_shim import OrchestraShim
 
 
@@ -64,6 +65,22 @@ def test_postinstall_replace_ndebug(orchestra: OrchestraShim):
     assert "NDEBUG" not in header_file.read_text()
 
 
+def test_postinstall_fix_shebangs(orchestra: OrchestraShim):
+    """Checks that the postinstall pass that makes shebangs in bin/ independent from the root works"""
+    orchestra("install", "-b", "component_that_tests_postinstall")
+
+    script = orchestra.orchestra_root / "bin" / "test-script"
+    assert script.read_text().splitlines()[0] == "#!/usr/bin/env python3"
+
+
+def test_postinstall_preserves_timestamps(orchestra: OrchestraShim):
+    """Checks that the files rewritten by the postinstall passes keep their modification time"""
+    orchestra("install", "-b", "component_that_tests_postinstall")
+
+    assert (orchestra.orchestra_root / "bin" / "test-script").stat().st_mtime == 1000000000
+    assert (orchestra.orchestra_root / "include" / "test.h").stat().st_mtime == 1000000000
+
+
 def test_skip_post_install(orchestra: OrchestraShim):
     """Checks that the skip_post_install configuration option works"""
     orchestra("install", "-b", "component_that_skips_post_install")
@@ -71,3 +88,24 @@ def test_skip_post_install(orchestra: OrchestraShim):
     file2 = orchestra.orchestra_root / "file2"
     assert not file1.is_symlink(), "postinstall run and transformed a hardlink into a synlink"
     assert not file2.is_symlink(), "postinstall run and transformed a hardlink into a synlink"
+
+
+def test_postinstall_shared_pool(tmp_path):
+    """Checks that a pool shared by multiple post-installs processes the files of all of them"""
+    pool = PostInstallPool(2)
+    try:
+        for component in ["a", "b"]:
+            root = tmp_path / component / "root"
+            (root / "bin").mkdir(parents=True)
+            for i in range(PARALLEL_MIN_FILES):
+                (root / "bin" / f"script{i}").write_text("#!/orchestra/root/bin/python\n")
+
+            options = PostInstallOptions(
+                root=str(root), orchestra_root="/orchestra/root", rpath_search_strings=(), ndebug=True, asan=False
+            )
+            result = post_install(options, pool=pool)
+
+            assert result.rewritten_files == PARALLEL_MIN_FILES
+            assert (root / "bin" / "script0").read_text() == "#!/usr/bin/env python\n"
+    finally:
+        pool.close()
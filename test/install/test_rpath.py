@@ -0,0 +1,57 @@
+import struct
+
+from orchestra.actions.rpath import RpathFixResult, fix_rpath
+
+BASE_ADDRESS = 0x400000
+
+
+def _write_elf(path, dynstr: bytes):
+    """Writes a minimal 64-bit little endian ELF with a dynamic segment and the given dynamic string table"""
+    header_size = 64
+    program_header_size = 56
+    dynamic_offset = header_size + 2 * program_header_size
+    dynamic = struct.pack("<qQqQqQ", 5, BASE_ADDRESS + dynamic_offset + 48, 10, len(dynstr), 0, 0)
+    dynstr_offset = dynamic_offset + len(dynamic)
+    file_size = dynstr_offset + len(dynstr)
+
+    header = b"\x7fELF" + bytes([2, 1, 1]) + bytes(9)
+    header += struct.pack(
+        "<HHIQQQIHHHHHH", 3, 62, 1, 0, header_size, 0, 0, header_size, program_header_size, 2, 0, 0, 0
+    )
+    load = struct.pack("<IIQQQQQQ", 1, 5, 0, BASE_ADDRESS, BASE_ADDRESS, file_size, file_size, 0x1000)
+    dynamic_header = struct.pack(
+        "<IIQQQQQQ", 2, 6, dynamic_offset, BASE_ADDRESS + dynamic_offset, 0, len(dynamic), len(dynamic), 8
+    )
+    path.write_bytes(header + load + dynamic_header + dynamic + dynstr)
+
+
+def test_fix_rpath(tmp_path):
+    """Checks that the search strings in the dynamic string table are replaced with paths relative to $ORIGIN"""
+    placeholder = "/" * 48 + "/orchestra/root"
+    elf_path = tmp_path / "root" / "bin" / "test"
+    elf_path.parent.mkdir(parents=True)
+    _write_elf(elf_path, b"\0libc.so.6\0" + placeholder.encode() + b"/lib\0")
+
+    assert fix_rpath(str(elf_path), str(tmp_path / "root"), [placeholder]) == RpathFixResult.PATCHED
+    patched = elf_path.read_bytes()
+    assert placeholder.encode() not in patched
+    assert b"\0libc.so.6\0$ORIGIN/../" + b"/" * (len(placeholder) - len("$ORIGIN/..")) + b"lib\0" in patched
+
+    # Nothing left to replace
+    assert fix_rpath(str(elf_path), str(tmp_path / "root"), [placeholder]) == RpathFixResult.SKIPPED
+
+
+def test_fix_rpath_skips_unsuitable_files(tmp_path):
+    """Checks that files which are not dynamic ELFs are left alone"""
+    script = tmp_path / "script"
+    script.write_text("#!/bin/sh\n")
+    assert fix_rpath(str(script), str(tmp_path), ["/orchestra/root"]) == RpathFixResult.NOT_ELF
+
+    truncated = tmp_path / "truncated"
+    truncated.write_bytes(b"\x7fELF\x02\x01")
+    assert fix_rpath(str(truncated), str(tmp_path), ["/orchestra/root"]) == RpathFixResult.SKIPPED
+
+    # The replacement would not fit
+    elf_path = tmp_path / "elf"
+    _write_elf(elf_path, b"\0/r/lib\0")
+    assert fix_rpath(str(elf_path), str(tmp_path), ["/r"]) == RpathFixResult.SKIPPED
@@ -0,0 +1,136 @@
+import networkx as nx
+import pytest
+
+import orchestra.executor
+from orchestra.actions import AnyOfAction
+from orchestra.exceptions import UserException
+from orchestra.executor import DUMMY_ROOT, Executor, group_orders, has_unsatisfied_cycles
+from orchestra.solvers import BACKTRACKING_SOLVER, CONSTRAINT_SOLVER
+
+
+class StubAction:
+    def __init__(self, name, satisfied):
+        self.name = name
+        self.satisfied = satisfied
+
+    def is_satisfied(self):
+        return self.satisfied
+
+    def __repr__(self):
+        return self.name
+
+
+def test_unsatisfied_cycles():
+    """Checks that has_unsatisfied_cycles detects cycles through at least one unsatisfied node"""
+    a = StubAction("a", satisfied=False)
+    b = StubAction("b", satisfied=True)
+    c = StubAction("c", satisfied=True)
+
+    assert not has_unsatisfied_cycles(nx.DiGraph([(a, b), (b, c)]))
+    assert not has_unsatisfied_cycles(nx.DiGraph([(a, b), (b, c), (c, b)]))
+    assert has_unsatisfied_cycles(nx.DiGraph([(a, b), (b, c), (c, a)]))
+    assert has_unsatisfied_cycles(nx.DiGraph([(a, a)]))
+    assert not has_unsatisfied_cycles(nx.DiGraph([(b, b)]))
+
+
+def test_unsatisfied_cycles_many_satisfied_cycles():
+    """Regression benchmark: a complete graph of satisfied nodes contains far too many simple cycles to be enumerated,
+    the check must not depend on their number"""
+    satisfied = [StubAction(f"satisfied_{i}", satisfied=True) for i in range(200)]
+    graph = nx.complete_graph(satisfied, create_using=nx.DiGraph)
+
+    unsatisfied = StubAction("unsatisfied", satisfied=False)
+    graph.add_edge(unsatisfied, satisfied[0])
+    assert not has_unsatisfied_cycles(graph)
+
+    graph.add_edge(satisfied[-1], unsatisfied)
+    assert has_unsatisfied_cycles(graph)
+
+
+def _count_explored_assignments(solver, choices_count):
+    """Builds a graph where the preferred choice of `first` makes `last` impossible to assign without an unsatisfied
+    cycle, and between them `choices_count` independent choices have to be assigned.
+    :returns the choices picked and the number of (partial) assignments explored by the given solver
+    """
+    root = StubAction("root", satisfied=False)
+    preferred = StubAction("preferred", satisfied=False)
+    fallback = StubAction("fallback", satisfied=False)
+    first = AnyOfAction({preferred, fallback}, preferred)
+    last_alternatives = [StubAction(f"last_{i}", satisfied=False) for i in range(2)]
+    last = AnyOfAction(set(last_alternatives), last_alternatives[0])
+
+    graph = nx.DiGraph([(DUMMY_ROOT, root), (root, first), (root, last), (preferred, last)])
+    graph.add_edges_from((first, a) for a in first.actions)
+    for alternative in last_alternatives:
+        graph.add_edges_from([(last, alternative), (alternative, first)])
+
+    independent = []
+    for i in range(choices_count):
+        alternatives = [StubAction(f"independent_{i}_{j}", satisfied=False) for j in range(2)]
+        any_of = AnyOfAction(set(alternatives), alternatives[0])
+        graph.add_edges_from([(root, any_of)] + [(any_of, a) for a in alternatives])
+        independent.append(any_of)
+
+    executor = Executor([], solver=solver)
+    explored = 0
+    search_assignment = executor._search_assignment
+
+    def counting_search_assignment(*args):
+        nonlocal explored
+        explored += 1
+        return search_assignment(*args)
+
+    executor._search_assignment = counting_search_assignment
+    # Choices are assigned starting from the end of the list
+    remaining = [last] + independent + [first]
+    component = set(graph.nodes) - {DUMMY_ROOT}
+    graph = executor._assign_strongly_connected_component(graph, remaining, component)
+    choices = {
+        any_of.preferred_action.name: [choice.name for choice in graph.successors(any_of)]
+        for any_of in [first, last] + independent
+    }
+    return choices, explored
+
+
+@pytest.mark.parametrize("choices_count", [4, 8])
+def test_constraint_solver_prunes(choices_count):
+    """Checks that the constraint solver discards a choice as soon as it makes another choice impossible, while the
+    backtracking solver only notices after assigning all the choices in between"""
+    backtracking_choices, backtracking_explored = _count_explored_assignments(BACKTRACKING_SOLVER, choices_count)
+    constraint_choices, constraint_explored = _count_explored_assignments(CONSTRAINT_SOLVER, choices_count)
+
+    assert backtracking_choices == constraint_choices
+    assert constraint_choices["preferred"] == ["fallback"]
+    # The backtracking solver explores all the assignments of the independent choices before giving up on `preferred`
+    assert backtracking_explored > 2**choices_count
+    # The constraint solver visits each choice once
+    assert constraint_explored == choices_count + 3
+
+
+@pytest.mark.parametrize("satisfied", [True, False])
+def test_group_orders(satisfied):
+    """Checks that the orders violating the constraints between groups are only generated if all the actions involved
+    are satisfied, and that each order is generated once"""
+    actions = [StubAction(f"action_{i}", satisfied=satisfied) for i in range(3)]
+    graph = nx.DiGraph([(actions[0], actions[1]), (actions[1], actions[2])])
+    groups = [{a} for a in actions]
+
+    orders = list(group_orders(graph, groups))
+
+    assert orders[0] == [0, 1, 2]
+    assert len(orders) == len({tuple(o) for o in orders})
+    assert len(orders) == (6 if satisfied else 1)
+
+
+def test_group_orders_limit(monkeypatch):
+    """Checks that the search for an admissible order of the groups gives up after trying MAX_GROUP_ORDERS orders"""
+    unsatisfied = [StubAction(f"unsatisfied_{i}", satisfied=False) for i in range(2)]
+    graph = nx.DiGraph([(unsatisfied[0], unsatisfied[1]), (unsatisfied[1], unsatisfied[0])])
+    groups = [{StubAction(f"action_{i}", satisfied=True)} for i in range(3)]
+    graph.add_nodes_from(a for group in groups for a in group)
+
+    assert Executor._try_group_orders(graph.copy(), groups, "component") is None
+
+    monkeypatch.setattr(orchestra.executor, "MAX_GROUP_ORDERS", 2)
+    with pytest.raises(UserException):
+        Executor._try_group_orders(graph, groups, "component")
@@ -0,0 +1,96 @@
+import os
+import threading
+
+import networkx as nx
+import pytest
+
+from orchestra.exceptions import UserException
+from orchestra.executor import Executor
+from orchestra.jobserver import JobServer
+
+
+class StubConfig:
+    def __init__(self, jobserver):
+        self.jobserver = jobserver
+
+
+class FailingAction:
+    def __init__(self, name, config, runs):
+        self.name = name
+        self.config = config
+        self.runs = runs
+
+    @property
+    def name_for_components(self):
+        return self.name
+
+    @property
+    def name_for_info(self):
+        return self.name
+
+    def estimated_duration(self):
+        return 1
+
+    def run(self, pretend=False, explicitly_requested=False):
+        self.runs.append(self.name)
+        raise UserException(f"{self.name} failed")
+
+    def __repr__(self):
+        return self.name
+
+
+def test_stop_on_failure_skips_actions_waiting_for_a_slot():
+    """Checks that, when an action fails, the actions whose worker is still waiting for a job slot are not run"""
+    jobserver = JobServer(2)
+    config = StubConfig(jobserver)
+    runs = []
+    actions = [FailingAction(name, config, runs) for name in ["a", "b"]]
+    graph = nx.DiGraph()
+    graph.add_nodes_from(actions)
+
+    executor = Executor(actions, jobs=2)
+    executor._init_toposorter(graph)
+    # A `make` job holds one of the two slots, so the actions have to run one at a time
+    slot_taken = threading.Event()
+    release_slot = threading.Event()
+
+    def make_job():
+        with jobserver.job_slot():
+            slot_taken.set()
+            release_slot.wait()
+
+    make_job_thread = threading.Thread(target=make_job)
+    make_job_thread.start()
+    try:
+        slot_taken.wait()
+        with executor._toposorter:
+            failed_actions = executor._run_actions(stop_on_failure=True)
+    finally:
+        release_slot.set()
+        make_job_thread.join()
+
+    assert len(runs) == 1
+    assert {a.name for a in failed_actions} == set(runs)
+
+
+def test_jobserver_close():
+    """Checks that the jobserver pipe is only created when needed, and created again with all its tokens after being
+    closed"""
+    jobserver = JobServer(3)
+    assert jobserver._pipe is None
+
+    read_fd, write_fd = jobserver.fds
+    assert f"--jobserver-auth={read_fd},{write_fd}" in jobserver.makeflags
+    jobserver.close()
+    assert jobserver._pipe is None
+    with pytest.raises(OSError):
+        os.fstat(read_fd)
+
+    # One slot is taken without a token, the other two consume the tokens of the new pipe
+    with jobserver.job_slot(), jobserver.job_slot(), jobserver.job_slot():
+        read_fd, _ = jobserver.fds
+        os.set_blocking(read_fd, False)
+        with pytest.raises(BlockingIOError):
+            os.read(read_fd, 1)
+        os.set_blocking(read_fd, True)
+    jobserver.close()
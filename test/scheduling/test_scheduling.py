@@ -72,3 +72,130 @@ def test_same_component_ordering(orchestra: OrchestraShim):
 
     # Install
     orchestra("install", "-b", "component_sco_A")
+
+
+def test_many_builds_ordering(orchestra: OrchestraShim):
+    """Checks that the order between many builds of the same component is found without trying all the permutations
+    (12! in this case)"""
+    orchestra("graph", "-b", "-s", "component_many_builds")
+    orchestra("install", "-b", "component_many_builds")
+
+
+@pytest.mark.parametrize(
+    "component",
+    [
+        "component_A",
+        "component_with_cyclic_dependency_A",
+        "component_cyclic_A",
+        "gcc",
+        "component_sco_A",
+    ],
+)
+def test_constraint_solver(orchestra: OrchestraShim, capsys, component):
+    """Checks that the constraint solver picks the same builds as the backtracking one"""
+    orchestra("graph", "-b", "-s", "--solver", "backtracking", component)
+    backtracking_graph = capsys.readouterr().out
+
+    orchestra("graph", "-b", "-s", "--solver", "constraint", component)
+    constraint_graph = capsys.readouterr().out
+
+    assert sorted(backtracking_graph.splitlines()) == sorted(constraint_graph.splitlines())
+
+    orchestra("install", "-b", "--solver", "constraint", component, should_fail=component == "component_cyclic_A")
+
+
+def test_constraint_solver_reject_choice_cycle(orchestra: OrchestraShim):
+    """Checks that the constraint solver rejects choices which cannot be taken without generating an unsatisfied
+    cycle"""
+    with pytest.raises(Exception):
+        orchestra("graph", "-b", "-s", "--solver", "constraint", "component_cyclic_C")
+
+
+def test_install_multiple_components(orchestra: OrchestraShim):
+    """Checks that multiple components can be installed with a single invocation"""
+    orchestra("install", "-b", "component_A", "component_with_cyclic_dependency_A")
+    assert (orchestra.orchestra_root / "share/orchestra/component_A.json").exists()
+    assert (orchestra.orchestra_root / "share/orchestra/component_with_cyclic_dependency_A.json").exists()
+
+
+def test_parallel_install(orchestra: OrchestraShim):
+    """Checks that --jobs runs independent actions concurrently"""
+    orchestra("install", "-b", "-j", "2", "component_parallel_root")
+
+
+def test_critical_path_scheduling(orchestra: OrchestraShim):
+    """Checks that, when running actions concurrently, the ones on the longest path are run first"""
+    orchestra("install", "-b", "-j", "2", "component_critical_root")
+
+
+def test_parallel_install_invalid_jobs(orchestra: OrchestraShim):
+    """Checks that a non-positive number of jobs is rejected"""
+    orchestra("install", "-b", "-j", "0", "component_parallel_root", should_fail=True)
+
+
+def test_keep_going(orchestra: OrchestraShim):
+    """Checks that --keep-going runs all the actions that do not depend on the failed one"""
+    orchestra("install", "-b", "component_keep_going_root", should_fail=True)
+    assert not (orchestra.orchestra_root / "share/orchestra/component_keep_going_ok.json").exists()
+
+    orchestra("install", "-b", "--keep-going", "component_keep_going_root", should_fail=True)
+    assert (orchestra.orchestra_root / "share/orchestra/component_keep_going_ok.json").exists()
+    assert not (orchestra.orchestra_root / "share/orchestra/component_keep_going_dependent.json").exists()
+
+
+def test_solved_plan_cache(orchestra: OrchestraShim, capsys):
+    """Checks that solved graphs are cached and that the cache is invalidated when the installed components change"""
+    orchestra("graph", "-b", "-s", "component_A")
+    solved_graph = capsys.readouterr().out
+    assert list((orchestra.orchestra_dotdir / "cache" / "solved_plans").glob("*.json"))
+
+    orchestra("graph", "-b", "-s", "component_A")
+    cached_graph = capsys.readouterr().out
+    assert sorted(cached_graph.splitlines()) == sorted(solved_graph.splitlines())
+
+    orchestra("install", "-b", "component_A")
+    capsys.readouterr()
+
+    orchestra("graph", "-b", "-s", "component_A")
+    graph_after_install = capsys.readouterr().out
+    orchestra("--no-config-cache", "graph", "-b", "-s", "component_A")
+    uncached_graph_after_install = capsys.readouterr().out
+    assert sorted(graph_after_install.splitlines()) == sorted(uncached_graph_after_install.splitlines())
+    assert sorted(graph_after_install.splitlines()) != sorted(solved_graph.splitlines())
+
+
+def test_satisfaction_snapshot(orchestra: OrchestraShim, monkeypatch):
+    """Checks that whether an action is satisfied is memoized, and computed again once the satisfaction snapshot is
+    invalidated, both explicitly and by running an action (even if it fails)"""
+    config = orchestra.configuration
+    build = config.get_build("component_A")
+    install = build.install
+
+    checks = []
+    is_satisfied = install._is_satisfied
+
+    def counting_is_satisfied():
+        satisfied = is_satisfied()
+        checks.append(satisfied)
+        return satisfied
+
+    monkeypatch.setattr(install, "_is_satisfied", counting_is_satisfied)
+
+    assert not install.is_satisfied()
+    assert not install.is_satisfied()
+    assert checks == [False]
+
+    orchestra("install", "-b", "component_A")
+    config.satisfaction_snapshot.invalidate()
+    assert install.is_satisfied()
+    assert install.is_satisfied()
+    assert checks == [False, True]
+
+    def failing_run(explicitly_requested=False):
+        raise Exception("Action failed")
+
+    monkeypatch.setattr(build.configure, "_run", failing_run)
+    with pytest.raises(Exception):
+        build.configure.run()
+    assert install.is_satisfied()
+    assert checks == [False, True, True]